@@ -1,22 +1,41 @@
 """Declare async btree api."""
 
 from .analyze import Node, analyze, stringify_analyze
-from .control import decision, fallback, repeat_until, selector, sequence
+from .blackboard import Blackboard, BlackboardScheduler, reactive
+from .compiler import compile
+from .control import (
+    decision,
+    fallback,
+    fallback_with_memory,
+    repeat_until,
+    selector,
+    sequence,
+    sequence_with_memory,
+)
 from .decorator import (
+    RateLimiter,
+    RetryPolicy,
     alias,
     always_failure,
     always_success,
+    cached,
+    circuit_breaker,
     decorate,
     ignore_exception,
     inverter,
     is_failure,
     is_success,
+    rate_limit,
     retry,
     retry_until_failed,
     retry_until_success,
+    single_flight,
+    throttle,
+    timeout,
 )
 from .definition import (
     FAILURE,
+    RUNNING,
     SUCCESS,
     AsyncInnerFunction,
     CallableFunction,
@@ -24,20 +43,29 @@ from .definition import (
     NodeMetadata,
     node_metadata,
 )
-from .leaf import action, condition
-from .parallele import parallele
+from .executor import ThreadPool, ThreadPoolMetrics
+from .leaf import action, condition, process_action, threaded_action
+from .optimizer import OptimizedTree, optimize
+from .parallele import ConcurrencyLimiter, foreach, parallele, parallele_as_completed, parallele_results
+from .pipeline import Pipeline, StageMetrics
 from .runner import BTreeRunner
-from .utils import afilter, amap, run
+from .utils import afilter, afilter_batched, amap, amap_batched, run
 
 __all__ = [
     "Node",
     "analyze",
     "stringify_analyze",
+    "Blackboard",
+    "BlackboardScheduler",
+    "reactive",
+    "compile",
     "decision",
     "fallback",
     "repeat_until",
     "selector",
     "sequence",
+    "fallback_with_memory",
+    "sequence_with_memory",
     "alias",
     "always_failure",
     "always_success",
@@ -47,9 +75,18 @@ __all__ = [
     "is_failure",
     "is_success",
     "retry",
+    "RetryPolicy",
     "retry_until_failed",
     "retry_until_success",
+    "timeout",
+    "RateLimiter",
+    "rate_limit",
+    "throttle",
+    "circuit_breaker",
+    "cached",
+    "single_flight",
     "FAILURE",
+    "RUNNING",
     "SUCCESS",
     "AsyncInnerFunction",
     "CallableFunction",
@@ -58,9 +95,23 @@ __all__ = [
     "ControlFlowException",
     "action",
     "condition",
+    "process_action",
+    "threaded_action",
+    "ThreadPool",
+    "ThreadPoolMetrics",
+    "OptimizedTree",
+    "optimize",
     "parallele",
+    "parallele_results",
+    "parallele_as_completed",
+    "foreach",
+    "ConcurrencyLimiter",
+    "Pipeline",
+    "StageMetrics",
     "afilter",
     "amap",
+    "amap_batched",
+    "afilter_batched",
     "run",
     "BTreeRunner",
 ]
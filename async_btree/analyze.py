@@ -1,7 +1,9 @@
 """Analyze definition."""
 
 from inspect import getclosurevars
+from itertools import repeat
 from typing import Any, NamedTuple, Optional, no_type_check
+from weakref import WeakKeyDictionary
 
 from .definition import CallableFunction, get_function_name, get_node_metadata
 
@@ -48,64 +50,117 @@ def _get_target_propertie_name(value):
     return value
 
 
-def _analyze_target_edges(edges):
-    if edges:
-        # it could be a collection of node or a single node
-        return list(map(analyze, edges if hasattr(edges, "__iter__") else [edges]))
-    return None
+class _Layout(NamedTuple):
+    """Closure layout of a function: what analyze read, but not values which could change."""
 
+    metadata: Any
+    name: str
+    properties: list[tuple[str, Any]]
+    edges: list[tuple[str, Any]]
 
-# pylint: disable=protected-access
-@no_type_check  # it's a shortcut for hasattr ...
-def analyze(target: CallableFunction) -> Node:
-    """Analyze specified target and return a Node representation.
 
-    Args:
-        target (CallableFunction): async function to analyze.
+# layout of already analyzed functions, dropped with function
+_layouts: "WeakKeyDictionary[Any, _Layout]" = WeakKeyDictionary()
 
-    Returns:
-        (Node): a node instance representation of target function
-    """
 
-    nonlocals = getclosurevars(target).nonlocals
+class _Value(NamedTuple):
+    """A constant with the interface of a closure cell."""
 
-    def _get_nonlocals_value_for(name):
-        return nonlocals.get(name, None)
+    cell_contents: Any
 
-    def _analyze_property(p):
-        """Return a tuple (name, value) or (name, function name) as property."""
-        value = _get_nonlocals_value_for(name=p)
-        return p.lstrip("_"), _get_target_propertie_name(value=value)
-
-    def _analyze_edges(egde_name):
-        """Lookup children node from egde_name local var."""
-        edges = _get_nonlocals_value_for(name=egde_name)
-        return (egde_name.lstrip("_"), _analyze_target_edges(edges=edges))
 
+@no_type_check  # it's a shortcut for hasattr ...
+def _get_layout(target: CallableFunction) -> _Layout:
+    metadata = getattr(target, "__node_metadata", None)
+    if not hasattr(target, "__code__"):
+        # method, partial, ... (same error as getclosurevars on unsupported callable)
+        cells = {name: _Value(value) for name, value in getclosurevars(target).nonlocals.items()}
+        return _new_layout(target, metadata, cells)
+
+    layout = _layouts.get(target)
+    # metadata could be replaced by alias_node_metadata
+    if layout is None or layout.metadata is not metadata:
+        cells = dict(zip(target.__code__.co_freevars, target.__closure__ or ()))
+        layout = _layouts[target] = _new_layout(target, metadata, cells)
+    return layout
+
+
+@no_type_check
+def _new_layout(target: CallableFunction, metadata: Any, cells: dict[str, Any]) -> _Layout:
     if hasattr(target, "__node_metadata"):
         node = get_node_metadata(target=target)
-        return Node(
+        return _Layout(
+            metadata=metadata,
             name=node.name,
-            properties=list(map(_analyze_property, node.properties)) if node.properties else [],
-            edges=list(
-                filter(
-                    lambda p: p is not None,
-                    map(_analyze_edges, node.edges or _DEFAULT_EDGES),
-                )
-            ),
+            properties=[(p.lstrip("_"), cells.get(p)) for p in node.properties or []],
+            edges=[(e.lstrip("_"), cells.get(e)) for e in node.edges or _DEFAULT_EDGES],
         )
-
     # simple function
-    return Node(
+    return _Layout(
+        metadata=metadata,
         name=get_function_name(target=target),
-        properties=list(map(_analyze_property, nonlocals.keys())),
+        properties=[(p.lstrip("_"), cell) for p, cell in cells.items()],
         edges=[],
     )
 
 
+def _read(cell) -> Any:
+    return cell.cell_contents if cell is not None else None
+
+
+def analyze(target: CallableFunction) -> Node:
+    """Analyze specified target and return a Node representation.
+
+    Tree is walked without recursion, closure layout of each function is cached,
+    and a subtree shared by several nodes is analyzed once (same Node instance).
+    Properties are read on each call, so they reflect current node state.
+
+    Args:
+        target (CallableFunction): async function to analyze.
+
+    Returns:
+        (Node): a node instance representation of target function
+    """
+    nodes: dict[int, Node] = {}
+    # (function, list to fill, index in list)
+    stack: list[tuple[Any, Optional[list], int]] = [(target, None, 0)]
+    result: Optional[Node] = None
+    while stack:
+        function, slots, index = stack.pop()
+        node = nodes.get(id(function))
+        if node is None:
+            layout = _get_layout(function)
+            node = Node(
+                layout.name,
+                [(name, _get_target_propertie_name(_read(cell))) for name, cell in layout.properties],
+                [],
+            )
+            nodes[id(function)] = node
+            pending: list = []
+            for name, cell in layout.edges:
+                edges = _read(cell)
+                if edges:
+                    # it could be a collection of node or a single node
+                    children = list(edges) if hasattr(edges, "__iter__") else [edges]
+                    child_nodes: Optional[list] = [None] * len(children)
+                    pending += zip(children, repeat(child_nodes), range(len(children)))
+                else:
+                    child_nodes = None
+                node.edges.append((name, child_nodes))
+            # keep children order
+            stack.extend(reversed(pending))
+        if slots is None:
+            result = node
+        else:
+            slots[index] = node
+    return result  # type: ignore[return-value]
+
+
 def stringify_analyze(target: Node, indent: int = 0, label: Optional[str] = None) -> str:
     """Stringify node representation of specified target.
 
+    Tree is walked without recursion, so deep trees could be printed.
+
     Args:
         target (CallableFunction): async function to analyze.
         indent (int): level identation (default to zero).
@@ -115,19 +170,26 @@ def stringify_analyze(target: Node, indent: int = 0, label: Optional[str] = None
         (str): a string node representation.
     """
     _ident = "    "
-    _space = f"{_ident * indent} "
-    result: str = ""
-    if label:
-        result += f"{_space}--({label})--> {target.name}:\n"
-        _space += f"{_ident}{' ' * len(label)}"
-    else:
-        result += f"{_space}--> {target.name}:\n"
-
-    for k, v in target.properties:
-        result += f"{_space}    {k}: {v}\n"
-
-    for _label, children in target.edges:
-        if children:
-            for child in children:
-                result += stringify_analyze(target=child, indent=indent + 1, label=_label)
-    return result
+    lines: list[str] = []
+    # (node, indent, label)
+    stack: list[tuple[Node, int, Optional[str]]] = [(target, indent, label)]
+    while stack:
+        node, level, node_label = stack.pop()
+        _space = f"{_ident * level} "
+        if node_label:
+            lines.append(f"{_space}--({node_label})--> {node.name}:\n")
+            _space += f"{_ident}{' ' * len(node_label)}"
+        else:
+            lines.append(f"{_space}--> {node.name}:\n")
+
+        for k, v in node.properties:
+            lines.append(f"{_space}    {k}: {v}\n")
+
+        # keep children order
+        stack.extend(
+            (child, level + 1, _label)
+            for _label, children in reversed(node.edges)
+            if children
+            for child in reversed(children)
+        )
+    return "".join(lines)
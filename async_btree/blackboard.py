@@ -0,0 +1,240 @@
+"""Blackboard module define a shared key/value store with change subscriptions.
+
+Leaves declare which keys they read and write, so a tree knows its inputs.
+`reactive` re-evaluate a subtree only when one of its inputs has changed,
+and `BlackboardScheduler` tick a tree only when one of its inputs has changed.
+"""
+
+from inspect import iscoroutinefunction
+from typing import Any, Callable, Iterable, NamedTuple, Optional
+from weakref import finalize
+
+from .definition import RUNNING, AsyncInnerFunction, CallableFunction, get_closure_vars, node_metadata
+from .leaf import action, condition
+from .runner import BTreeRunner
+
+__all__ = ["Blackboard", "BlackboardAccess", "BlackboardScheduler", "get_reads", "get_writes", "reactive"]
+
+_MISSING = object()
+
+
+class BlackboardAccess(NamedTuple):
+    """Keys read and written by a node.
+
+    Attributes:
+        reads (frozenset[str]): keys read by node.
+        writes (frozenset[str]): keys written by node.
+    """
+
+    reads: frozenset = frozenset()
+    writes: frozenset = frozenset()
+
+
+class Blackboard:
+    """Key/value store which notify subscribers when a value change.
+
+    Values are compared with `==`, setting an equal value notify nobody.
+    """
+
+    def __init__(self, **values: Any) -> None:
+        self._values: dict[str, Any] = dict(values)
+        self._subscribers: dict[str, list[Callable[[str], None]]] = {}
+
+    def __getitem__(self, key: str) -> Any:
+        return self._values[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        previous = self._values.get(key, _MISSING)
+        if previous is not _MISSING and previous == value:
+            return
+        self._values[key] = value
+        for callback in list(self._subscribers.get(key, ())):
+            callback(key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._values
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._values.get(key, default)
+
+    def update(self, **values: Any) -> None:
+        for key, value in values.items():
+            self[key] = value
+
+    def subscribe(self, keys: Iterable[str], callback: Callable[[str], None]) -> Callable[[], None]:
+        """Call callback with key name each time one of keys change.
+
+        Args:
+            keys (Iterable[str]): keys to watch
+            callback (Callable[[str], None]): function called with changed key
+
+        Returns:
+            (Callable[[], None]): a function which cancel this subscription.
+        """
+        _keys = list(keys)
+        for key in _keys:
+            self._subscribers.setdefault(key, []).append(callback)
+
+        def _unsubscribe():
+            for key in _keys:
+                callbacks = self._subscribers.get(key, [])
+                if callback in callbacks:
+                    callbacks.remove(callback)
+
+        return _unsubscribe
+
+    def condition(self, target: CallableFunction, reads: Iterable[str] = (), **kwargs) -> AsyncInnerFunction:
+        """Declare a condition leaf which read specified keys (see leaf.condition)."""
+        return _declare(condition(target, **kwargs), reads=reads, writes=())
+
+    def action(
+        self, target: CallableFunction, reads: Iterable[str] = (), writes: Iterable[str] = (), **kwargs
+    ) -> AsyncInnerFunction:
+        """Declare an action leaf which read and write specified keys (see leaf.action)."""
+        return _declare(action(target, **kwargs), reads=reads, writes=writes)
+
+
+def _declare(node: AsyncInnerFunction, reads: Iterable[str], writes: Iterable[str]) -> AsyncInnerFunction:
+    node.__blackboard_access = BlackboardAccess(reads=frozenset(reads), writes=frozenset(writes))  # type: ignore
+    return node
+
+
+def get_reads(tree: CallableFunction) -> frozenset:
+    """Returns all keys read by nodes of tree.
+
+    Args:
+        tree (CallableFunction): behaviour tree to analyze
+
+    Returns:
+        (frozenset[str]): keys declared as read by leaves of tree.
+    """
+    return frozenset(key for access in _get_accesses(tree) for key in access.reads)
+
+
+def get_writes(tree: CallableFunction) -> frozenset:
+    """Returns all keys written by nodes of tree.
+
+    Args:
+        tree (CallableFunction): behaviour tree to analyze
+
+    Returns:
+        (frozenset[str]): keys declared as written by leaves of tree.
+    """
+    return frozenset(key for access in _get_accesses(tree) for key in access.writes)
+
+
+def _get_accesses(tree: CallableFunction) -> list[BlackboardAccess]:
+    """Returns blackboard access of all nodes of tree."""
+    accesses: list[BlackboardAccess] = []
+    visited: set[int] = set()
+    pending: list[Any] = [tree]
+    while pending:
+        value = pending.pop()
+        if id(value) in visited:
+            continue
+        visited.add(id(value))
+        if isinstance(value, (list, tuple)):
+            pending.extend(item for item in value if callable(item) or isinstance(item, (list, tuple)))
+        elif callable(value):
+            access = getattr(value, "__blackboard_access", None)
+            if access:
+                accesses.append(access)
+            if hasattr(value, "__wrapped__"):
+                pending.append(value.__wrapped__)
+            if hasattr(value, "__code__") and hasattr(value, "__closure__"):
+                pending.extend(get_closure_vars(value).values())
+    return accesses
+
+
+def reactive(child: CallableFunction, blackboard: Blackboard) -> AsyncInnerFunction:
+    """Re-evaluate child only when a key it read has changed.
+
+    Otherwise, return last child result. A RUNNING child is evaluated on each call.
+    Blackboard does not keep node alive, subscription is cancelled when node is garbage collected.
+
+    Args:
+        child (CallableFunction): child function to decorate
+        blackboard (Blackboard): blackboard which hold keys read by child
+
+    Returns:
+        (AsyncInnerFunction): an awaitable function.
+    """
+    _child = child
+    _child_is_async = iscoroutinefunction(child)
+    # RUNNING mean 'to evaluate', as a running child must be evaluated again
+    result: Any = RUNNING
+
+    def _invalidate(key: str):
+        nonlocal result
+        result = RUNNING
+
+    @node_metadata()
+    async def _reactive():
+        nonlocal result
+        if result is RUNNING:
+            result = (await _child()) if _child_is_async else _child()
+        return result
+
+    # _invalidate only hold result, not node
+    finalize(_reactive, blackboard.subscribe(get_reads(child), _invalidate))
+    return _reactive
+
+
+class BlackboardScheduler:
+    """Tick a behaviour tree with a BTreeRunner only when one of its inputs has changed.
+
+    The tree is evaluated on first tick, when a key read by tree change,
+    and while tree is RUNNING.
+    """
+
+    def __init__(self, runner: BTreeRunner, tree: CallableFunction, blackboard: Blackboard) -> None:
+        """Create a scheduler.
+
+        Args:
+            runner (BTreeRunner): runner used to evaluate tree
+            tree (CallableFunction): behaviour tree
+            blackboard (Blackboard): blackboard which hold keys read by tree
+        """
+        self._runner = runner
+        self._tree = tree
+        self._pending = True
+        self._unsubscribe = blackboard.subscribe(get_reads(tree), self._invalidate)
+        self.result: Any = None
+
+    def _invalidate(self, key: str):
+        self._pending = True
+
+    @property
+    def pending(self) -> bool:
+        """True if next tick will evaluate tree."""
+        return self._pending or self.result is RUNNING
+
+    def tick(self) -> bool:
+        """Evaluate tree if pending.
+
+        Returns:
+            (bool): True if tree has been evaluated.
+        """
+        if not self.pending:
+            return False
+        self._pending = False
+        self.result = self._runner.run(self._tree)
+        return True
+
+    def settle(self, max_ticks: Optional[int] = None) -> int:
+        """Tick until tree is no more pending (writes of tree could trigger new ticks).
+
+        Args:
+            max_ticks (Optional[int]): max number of ticks (None means no limit)
+
+        Returns:
+            (int): number of evaluations.
+        """
+        ticks = 0
+        while (max_ticks is None or ticks < max_ticks) and self.tick():
+            ticks += 1
+        return ticks
+
+    def close(self) -> None:
+        """Stop watching blackboard."""
+        self._unsubscribe()
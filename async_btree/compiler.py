@@ -0,0 +1,382 @@
+"""Compiler module define a tree compiler which inline control flow.
+
+Each node of a behaviour tree is a closure which await its children.
+Evaluating a tree of hundreds of nodes create as many coroutine frames on each call.
+
+`compile` walk the same closure information as `analyze` does and generate
+python source code of a single async function with all known control flow inlined.
+Unknown nodes (user functions, parallele, ...) are simply awaited, or called if they are sync.
+"""
+
+from inspect import iscoroutinefunction
+from time import monotonic
+from types import CodeType
+from typing import Any, Callable, Optional
+
+from . import control, decorator, leaf, utils
+from .deadline import current_deadline, deadline_exceeded
+from .definition import (
+    FAILURE,
+    RUNNING,
+    SUCCESS,
+    AsyncInnerFunction,
+    CallableFunction,
+    ControlFlowException,
+    get_closure_vars,
+    get_inner_code,
+    get_node_metadata,
+)
+
+__all__ = ["compile"]
+
+# Python refuse to compile more than 20 statically nested blocks,
+# and the tokenizer limit indentation level at 100.
+_MAX_BLOCKS = 12
+_MAX_INDENT = 40
+# max nested nodes inlined in a function, bound recursion of code generation
+_MAX_DEPTH = 50
+
+_INDENT = "    "
+
+
+class _Body:
+    """Source code of a generated function body."""
+
+    def __init__(self, compiler: "_Compiler"):
+        self.compiler = compiler
+        self.lines: list[str] = []
+        self.indent = 1
+        self.blocks = 0
+        self.depth = 0
+
+    def emit(self, line: str):
+        self.lines.append(f"{_INDENT * self.indent}{line}")
+
+    def saturated(self) -> bool:
+        return self.blocks >= _MAX_BLOCKS or self.indent >= _MAX_INDENT or self.depth >= _MAX_DEPTH
+
+    def node(self, target: CallableFunction, var: str):
+        """Emit code which evaluate target and store result in var."""
+        handler = _HANDLERS.get(getattr(target, "__code__", None))
+        if handler is None:
+            self.call(target, var)
+        elif handler in _LEAF_HANDLERS or not self.saturated():
+            self.depth += 1
+            handler(self, get_closure_vars(target), var)
+            self.depth -= 1
+        else:
+            # too deep, compile this subtree as a separate function
+            self.emit(f"{var} = await {self.compiler.function(target)}()")
+
+    def call(self, target: CallableFunction, var: str, arguments: str = ""):
+        """Emit a call of target, sync function are not awaited (even inside a to_async wrapper)."""
+        if getattr(target, "__code__", None) is _TO_ASYNC:
+            self.emit(f"{var} = {self.compiler.bind(get_closure_vars(target)['target'])}({arguments})")
+        elif iscoroutinefunction(target):
+            self.emit(f"{var} = await {self.compiler.bind(target)}({arguments})")
+        else:
+            self.emit(f"{var} = {self.compiler.bind(target)}({arguments})")
+
+    def reraise(self, error: str):
+        self.indent -= 1
+        self.emit(f"except Exception as {error}:")
+        self.emit(f"{_INDENT}raise ControlFlowException.instanciate({error})")
+
+
+class _Compiler:
+    """Hold generated functions and their namespace."""
+
+    def __init__(self, results: Optional[str] = None):
+        # default results mode of sequence
+        self.results = results
+        self.namespace: dict[str, Any] = {
+            "SUCCESS": SUCCESS,
+            "FAILURE": FAILURE,
+            "RUNNING": RUNNING,
+            "ControlFlowException": ControlFlowException,
+            "current_deadline": current_deadline,
+            "deadline_exceeded": deadline_exceeded,
+            "monotonic": monotonic,
+        }
+        self.sources: list[str] = []
+        # (function name, target) to generate
+        self._pending: list[tuple[str, CallableFunction]] = []
+        self._names: dict[int, str] = {}
+        self._counter = 0
+
+    def var(self, prefix: str) -> str:
+        self._counter += 1
+        return f"{prefix}{self._counter}"
+
+    def bind(self, value: Any) -> str:
+        """Returns name of value inside generated namespace."""
+        name = self._names.get(id(value))
+        if name is None:
+            name = self._names[id(value)] = self.var("n")
+            self.namespace[name] = value
+        return name
+
+    def function(self, target: CallableFunction) -> str:
+        """Returns name of an async function which evaluate target, generated by `generate`."""
+        name = self.var("_compiled")
+        self._pending.append((name, target))
+        return name
+
+    def generate(self):
+        """Generate pending functions, one after the other so deep trees do not recurse."""
+        while self._pending:
+            name, target = self._pending.pop()
+            result = self.var("v")
+            body = _Body(self)
+            body.node(target, result)
+            self.sources.append("\n".join([f"async def {name}():", *body.lines, f"{_INDENT}return {result}", ""]))
+
+
+def _sequence(body: _Body, closure: dict[str, Any], var: str):
+    children = closure["_children"]
+    succes_threshold = closure["_succes_threshold"]
+    failure_threshold = closure["failure_threshold"]
+    mode = closure["_results"] or body.compiler.results or "all"
+    success, failure, results = body.compiler.var("s"), body.compiler.var("f"), body.compiler.var("r")
+    deadline = body.compiler.var("d")
+    body.emit(f"{success} = {failure} = 0")
+    if mode == "all":
+        body.emit(f"{results} = []")
+    body.emit(f"{deadline} = current_deadline.get()")
+    body.emit("while True:")
+    body.indent += 1
+    body.blocks += 1
+    for child in children:
+        last_result = body.compiler.var("v")
+        body.emit(f"if {deadline} is not None and monotonic() >= {deadline}:")
+        body.emit(f"{_INDENT}{var} = deadline_exceeded()")
+        body.emit(f"{_INDENT}break")
+        body.node(child, last_result)
+        if mode == "all":
+            body.emit(f"{results}.append({last_result})")
+        body.emit(f"if {last_result}:")
+        body.emit(f"{_INDENT}{success} += 1")
+        body.emit(f"{_INDENT}if {success} == {succes_threshold}:")
+        success_result = {"all": results, "last": last_result, "none": "SUCCESS"}[mode]
+        body.emit(f"{_INDENT * 2}{var} = {success_result}")
+        body.emit(f"{_INDENT * 2}break")
+        body.emit("else:")
+        body.emit(f"{_INDENT}if {last_result} is RUNNING:")
+        body.emit(f"{_INDENT * 2}{var} = RUNNING")
+        body.emit(f"{_INDENT * 2}break")
+        body.emit(f"{_INDENT}{failure} += 1")
+        body.emit(f"{_INDENT}if {failure} == {failure_threshold}:")
+        body.emit(f"{_INDENT * 2}{var} = {last_result}")
+        body.emit(f"{_INDENT * 2}break")
+    body.emit(f"{var} = FAILURE")
+    body.emit("break")
+    body.blocks -= 1
+    body.indent -= 1
+
+
+def _decision(body: _Body, closure: dict[str, Any], var: str):
+    condition = body.compiler.var("v")
+    body.node(closure["_condition"], condition)
+    body.emit(f"if {condition}:")
+    body.indent += 1
+    body.node(closure["_success_tree"], var)
+    body.indent -= 1
+    body.emit(f"elif {condition} is RUNNING:")
+    body.emit(f"{_INDENT}{var} = RUNNING")
+    body.emit("else:")
+    body.indent += 1
+    if closure["_failure_tree"]:
+        body.node(closure["_failure_tree"], var)
+    else:
+        body.emit(f"{var} = SUCCESS")
+    body.indent -= 1
+
+
+def _repeat_until(body: _Body, closure: dict[str, Any], var: str):
+    condition = body.compiler.var("v")
+    body.emit(f"{var} = FAILURE")
+    body.emit("while True:")
+    body.indent += 1
+    body.blocks += 1
+    body.node(closure["_condition"], condition)
+    body.emit(f"if not {condition}:")
+    body.emit(f"{_INDENT}if {condition} is RUNNING:")
+    body.emit(f"{_INDENT * 2}{var} = RUNNING")
+    body.emit(f"{_INDENT}break")
+    body.node(closure["_child"], var)
+    body.emit(f"if {var} is RUNNING:")
+    body.emit(f"{_INDENT}break")
+    body.blocks -= 1
+    body.indent -= 1
+
+
+def _alias(body: _Body, closure: dict[str, Any], var: str):
+    body.node(closure["_child"], var)
+
+
+def _decorate(body: _Body, closure: dict[str, Any], var: str):
+    child_result = body.compiler.var("v")
+    body.node(closure["_child"], child_result)
+    kwargs = f", **{body.compiler.bind(closure['kwargs'])}" if closure["kwargs"] else ""
+    body.call(closure["_decorator"], var, arguments=f"{child_result}{kwargs}")
+
+
+def _ignore_exception(body: _Body, closure: dict[str, Any], var: str):
+    error = body.compiler.var("e")
+    body.emit("try:")
+    body.indent += 1
+    body.blocks += 1
+    body.node(closure["_child"], var)
+    body.blocks -= 1
+    body.indent -= 1
+    body.emit(f"except Exception as {error}:")
+    body.emit(f"{_INDENT}{var} = ControlFlowException.instanciate({error})")
+
+
+def _always(expression: str):
+    def _handler(body: _Body, closure: dict[str, Any], var: str):
+        child_result = body.compiler.var("v")
+        body.emit("try:")
+        body.indent += 1
+        body.blocks += 1
+        body.node(closure["_child"], child_result)
+        body.blocks -= 1
+        body.reraise(error=body.compiler.var("e"))
+        body.emit(f"{var} = {expression.format(child_result)}")
+
+    return _handler
+
+
+def _test(expression: str):
+    def _handler(body: _Body, closure: dict[str, Any], var: str):
+        child_result = body.compiler.var("v")
+        body.node(closure["_child"], child_result)
+        body.emit(f"{var} = {expression.format(child_result)}")
+
+    return _handler
+
+
+def _retry(body: _Body, closure: dict[str, Any], var: str):
+    policy, on_attempt = closure["policy"], closure["on_attempt"]
+    deadline = body.compiler.var("d")
+    body.emit(f"{deadline} = current_deadline.get()")
+    if policy is None and on_attempt is None:
+        retry_count = body.compiler.var("c")
+        body.emit(f"{retry_count} = {closure['max_retry']}")
+        body.emit(f"{var} = FAILURE")
+        body.emit(f"while not {var} and {retry_count} != 0:")
+        body.indent += 1
+        body.blocks += 1
+        body.emit(
+            f"if {retry_count} != {closure['max_retry']} and {deadline} is not None and monotonic() >= {deadline}:"
+        )
+        body.emit(f"{_INDENT}break")
+        body.node(closure["_child"], var)
+        body.emit(f"if {var} is RUNNING:")
+        body.emit(f"{_INDENT}break")
+        body.emit(f"{retry_count} -= 1")
+        body.blocks -= 1
+        body.indent -= 1
+        return
+    # same loop as decorator.retry
+    retry_count, attempt, started = body.compiler.var("c"), body.compiler.var("a"), body.compiler.var("t")
+    body.emit(f"{retry_count} = {closure['max_retry']}")
+    body.emit(f"{attempt} = 0")
+    body.emit(f"{started} = monotonic()")
+    body.emit(f"{var} = FAILURE")
+    body.emit(f"while {retry_count} != 0:")
+    body.indent += 1
+    body.blocks += 1
+    body.emit(f"if {attempt} and {deadline} is not None and monotonic() >= {deadline}:")
+    body.emit(f"{_INDENT}break")
+    body.node(closure["_child"], var)
+    body.emit(f"{attempt} += 1")
+    if on_attempt is not None:
+        body.emit(f"{body.compiler.bind(on_attempt)}({attempt}, {var})")
+    body.emit(f"{retry_count} -= 1")
+    body.emit(f"if {var} is RUNNING or {retry_count} == 0:")
+    body.emit(f"{_INDENT}break")
+    if policy is None:
+        body.emit(f"if {var}:")
+    else:
+        name = body.compiler.bind(policy)
+        body.emit(f"if not {name}.should_retry({var}) or not await {name}.wait({attempt}, {started}):")
+    body.emit(f"{_INDENT}break")
+    body.blocks -= 1
+    body.indent -= 1
+
+
+def _action(body: _Body, closure: dict[str, Any], var: str):
+    body.emit("try:")
+    body.indent += 1
+    kwargs = f"**{body.compiler.bind(closure['kwargs'])}" if closure["kwargs"] else ""
+    body.call(closure["_target"], var, arguments=kwargs)
+    body.reraise(error=body.compiler.var("e"))
+
+
+def _to_async(body: _Body, closure: dict[str, Any], var: str):
+    body.emit(f"{var} = {body.compiler.bind(closure['target'])}()")
+
+
+_TO_ASYNC = get_inner_code(utils.to_async, "_to_async")
+
+_LEAF_HANDLERS = [_action, _to_async]
+
+_HANDLERS: dict[Optional[CodeType], Callable[[_Body, dict[str, Any], str], None]] = {
+    get_inner_code(control.sequence, "_sequence"): _sequence,
+    get_inner_code(control.decision, "_decision"): _decision,
+    get_inner_code(control.repeat_until, "_repeat_until"): _repeat_until,
+    get_inner_code(decorator.alias, "_alias"): _alias,
+    get_inner_code(decorator.decorate, "_decorate"): _decorate,
+    get_inner_code(decorator.ignore_exception, "_ignore_exception"): _ignore_exception,
+    get_inner_code(decorator.always_success, "_always_success"): _always("{0} if {0} or {0} is RUNNING else SUCCESS"),
+    get_inner_code(decorator.always_failure, "_always_failure"): _always("{0} if not {0} else FAILURE"),
+    get_inner_code(decorator.is_success, "_is_success"): _test(
+        "SUCCESS if {0} else RUNNING if {0} is RUNNING else FAILURE"
+    ),
+    get_inner_code(decorator.is_failure, "_is_failure"): _test(
+        "FAILURE if {0} else RUNNING if {0} is RUNNING else SUCCESS"
+    ),
+    get_inner_code(decorator.inverter, "_inverter"): _test("RUNNING if {0} is RUNNING else not {0}"),
+    get_inner_code(decorator.retry, "_retry"): _retry,
+    get_inner_code(leaf.action, "_action"): _action,
+    _TO_ASYNC: _to_async,
+}
+
+
+def compile(tree: CallableFunction, results: Optional[str] = None) -> AsyncInnerFunction:
+    """Compile a behaviour tree into a single flat async function.
+
+    Control flow of `sequence`, `fallback`, `selector`, `decision`, `repeat_until`,
+    decorators and leaves is inlined, sync functions are called without their
+    `to_async` wrapper. Any other node is awaited as is.
+
+    The compiled function return same results as the interpreted tree.
+    Original tree is available as `__wrapped__` attribute.
+
+    Args:
+        tree (CallableFunction): behaviour tree to compile
+        results (Optional[str]): results mode ("all", "last", "none") of sequence nodes
+            which do not define one (see sequence).
+
+    Returns:
+        (AsyncInnerFunction): an awaitable function.
+
+    Raises:
+        (AssertionError): if results is invalid
+
+    Example:
+        ```tree = compile(sequence(children=[condition(is_ready), action(fire)]))```
+
+    """
+    if results is not None and results not in control._RESULTS:
+        raise AssertionError("results")
+    compiler = _Compiler(results=results)
+    name = compiler.function(tree)
+    compiler.generate()
+    exec("\n".join(compiler.sources), compiler.namespace)
+    compiled = compiler.namespace[name]
+    compiled.__wrapped__ = tree
+    if hasattr(tree, "__node_metadata"):
+        compiled.__node_metadata = get_node_metadata(target=tree)
+    return compiled
@@ -1,21 +1,46 @@
 """Control function definition."""
 
+from inspect import iscoroutinefunction
+from time import monotonic
 from typing import Any, Optional
 
+from .deadline import current_deadline, deadline_exceeded
 from .definition import (
     FAILURE,
+    RUNNING,
     SUCCESS,
     AsyncInnerFunction,
     CallableFunction,
     alias_node_metadata,
     node_metadata,
 )
-from .utils import to_async
 
-__all__ = ["sequence", "fallback", "selector", "decision", "repeat_until"]
+__all__ = [
+    "sequence",
+    "fallback",
+    "selector",
+    "sequence_with_memory",
+    "fallback_with_memory",
+    "decision",
+    "repeat_until",
+]
 
+_RESULTS = ["all", "last", "none"]
 
-def sequence(children: list[CallableFunction], succes_threshold: Optional[int] = None) -> AsyncInnerFunction:
+
+def _succes_threshold_of(children: list[CallableFunction], succes_threshold: Optional[int], results: Optional[str]):
+    """Returns succes threshold value of a sequence after checking its arguments."""
+    _succes_threshold = succes_threshold or len(children)
+    if not (0 <= _succes_threshold <= len(children)):
+        raise AssertionError("succes_threshold")
+    if results is not None and results not in _RESULTS:
+        raise AssertionError("results")
+    return _succes_threshold
+
+
+def sequence(
+    children: list[CallableFunction], succes_threshold: Optional[int] = None, results: Optional[str] = None
+) -> AsyncInnerFunction:
     """Return a function which execute children in sequence.
 
     succes_threshold parameter generalize traditional sequence/fallback and
@@ -26,43 +51,59 @@ def sequence(children: list[CallableFunction], succes_threshold: Optional[int] =
     if #failure = len(children) - succes_threshold, return a failure
 
     What we can return as value and keep sematic Failure/Success:
-     - an array of previous result when success
+     - on success, according to results mode:
+        - "all": an array of previous result (default)
+        - "last": last success
+        - "none": SUCCESS, no result is kept
      - last failure when fail
+     - RUNNING as soon as a child is running
+     - a ControlFlowException of a TimeoutError if deadline (see timeout) is reached before a child
 
     Args:
         children (list[CallableFunction]): list of Awaitable
         succes_threshold (int): succes threshold value
+        results (Optional[str]): results mode in "all", "last", "none" (None means "all")
 
     Returns:
         (AsyncInnerFunction): an awaitable function.
 
     Raises:
-        (AssertionError): if succes_threshold is invalid
+        (AssertionError): if succes_threshold or results is invalid
     """
-    _succes_threshold = succes_threshold or len(children)
-    if not (0 <= _succes_threshold <= len(children)):
-        raise AssertionError("succes_threshold")
+    _succes_threshold = _succes_threshold_of(children, succes_threshold, results)
+    _results = results
+    collect = results in (None, "all")
 
     failure_threshold = len(children) - _succes_threshold + 1
 
-    _children = [to_async(child) for child in children]
+    # sync children are called directly, without a coroutine
+    _children = list(children)
+    _async_children = [iscoroutinefunction(child) for child in _children]
 
     @node_metadata(properties=["_succes_threshold"])
     async def _sequence():
         success = 0
         failure = 0
-        results = []
+        child_results: Optional[list[Any]] = [] if collect else None
+        deadline = current_deadline.get()
 
-        for child in _children:
-            last_result = await child()
-            results.append(last_result)
+        for child, is_async in zip(_children, _async_children):
+            if deadline is not None and monotonic() >= deadline:
+                return deadline_exceeded()
+            last_result = (await child()) if is_async else child()
+            if child_results is not None:
+                child_results.append(last_result)
 
             if bool(last_result):
                 success += 1
                 if success == _succes_threshold:
                     # last evaluation is a success
-                    return results
+                    if child_results is not None:
+                        return child_results
+                    return last_result if _results == "last" else SUCCESS
             else:
+                if last_result is RUNNING:
+                    return RUNNING
                 failure += 1
                 if failure == failure_threshold:
                     # last evaluation is a failure
@@ -73,7 +114,7 @@ def sequence(children: list[CallableFunction], succes_threshold: Optional[int] =
     return _sequence
 
 
-def fallback(children: list[CallableFunction]) -> AsyncInnerFunction:
+def fallback(children: list[CallableFunction], results: Optional[str] = None) -> AsyncInnerFunction:
     """Execute tasks in sequence and succeed if one succeed or failed if all failed.
 
     Often named 'selector', children can be seen as an ordered list
@@ -81,21 +122,115 @@ def fallback(children: list[CallableFunction]) -> AsyncInnerFunction:
 
     Args:
         children (list[CallableFunction]): list of Awaitable
+        results (Optional[str]): results mode in "all", "last", "none" (see sequence)
 
     Returns:
         (AsyncInnerFunction): an awaitable function.
     """
     return alias_node_metadata(
         name="fallback",
-        target=sequence(children, succes_threshold=min(1, len(children))),
+        target=sequence(children, succes_threshold=min(1, len(children)), results=results),
     )
 
 
-def selector(children: list[CallableFunction]) -> AsyncInnerFunction:
+def selector(children: list[CallableFunction], results: Optional[str] = None) -> AsyncInnerFunction:
     """Synonym of fallback."""
     return alias_node_metadata(
         name="selector",
-        target=sequence(children, succes_threshold=min(1, len(children))),
+        target=sequence(children, succes_threshold=min(1, len(children)), results=results),
+    )
+
+
+def sequence_with_memory(
+    children: list[CallableFunction], succes_threshold: Optional[int] = None, results: Optional[str] = None
+) -> AsyncInnerFunction:
+    """Return a function which execute children in sequence and resume at the running child.
+
+    Same as sequence, but when a child return RUNNING, the evaluation stop and return RUNNING.
+    Next evaluation resume at this child, children which have already finished
+    are not evaluated again until the sequence finish.
+
+    State is kept inside the node, a tree with memory nodes should not be evaluated concurrently.
+
+    Args:
+        children (list[CallableFunction]): list of Awaitable
+        succes_threshold (int): succes threshold value
+        results (Optional[str]): results mode in "all", "last", "none" (None means "all")
+
+    Returns:
+        (AsyncInnerFunction): an awaitable function.
+
+    Raises:
+        (AssertionError): if succes_threshold or results is invalid
+    """
+    _succes_threshold = _succes_threshold_of(children, succes_threshold, results)
+    _results = results
+    collect = results in (None, "all")
+
+    failure_threshold = len(children) - _succes_threshold + 1
+
+    _children = list(children)
+    _async_children = [iscoroutinefunction(child) for child in _children]
+
+    # evaluation state
+    index = success = failure = 0
+    child_results: list[Any] = []
+
+    def _reset():
+        nonlocal index, success, failure, child_results
+        index = success = failure = 0
+        if collect:
+            child_results = []
+
+    @node_metadata(properties=["_succes_threshold"])
+    async def _sequence_with_memory():
+        nonlocal index, success, failure
+        try:
+            while index < len(_children):
+                child = _children[index]
+                last_result = (await child()) if _async_children[index] else child()
+                if last_result is RUNNING:
+                    return RUNNING
+                index += 1
+                if collect:
+                    child_results.append(last_result)
+
+                if bool(last_result):
+                    success += 1
+                    if success == _succes_threshold:
+                        # last evaluation is a success
+                        result = child_results if collect else (last_result if _results == "last" else SUCCESS)
+                        _reset()
+                        return result
+                else:
+                    failure += 1
+                    if failure == failure_threshold:
+                        # last evaluation is a failure
+                        _reset()
+                        return last_result
+        except BaseException:
+            _reset()
+            raise
+        # should be never reached
+        _reset()
+        return FAILURE
+
+    return _sequence_with_memory
+
+
+def fallback_with_memory(children: list[CallableFunction], results: Optional[str] = None) -> AsyncInnerFunction:
+    """Fallback which resume at the running child (see sequence_with_memory).
+
+    Args:
+        children (list[CallableFunction]): list of Awaitable
+        results (Optional[str]): results mode in "all", "last", "none" (see sequence)
+
+    Returns:
+        (AsyncInnerFunction): an awaitable function.
+    """
+    return alias_node_metadata(
+        name="fallback_with_memory",
+        target=sequence_with_memory(children, succes_threshold=min(1, len(children)), results=results),
     )
 
 
@@ -107,6 +242,7 @@ def decision(
     """Create a decision node.
 
     If condition is meet, return evaluation of success_tree.
+    If condition is running, return RUNNING.
     Otherwise, it return SUCCESS or evaluation of failure_tree if setted.
 
     Args:
@@ -120,16 +256,22 @@ def decision(
         (AsyncInnerFunction): an awaitable function.
     """
 
-    _condition = to_async(condition)
-    _success_tree = to_async(success_tree)
-    _failure_tree = to_async(failure_tree) if failure_tree else None
+    _condition = condition
+    _condition_is_async = iscoroutinefunction(condition)
+    _success_tree = success_tree
+    _success_tree_is_async = iscoroutinefunction(success_tree)
+    _failure_tree = failure_tree
+    _failure_tree_is_async = iscoroutinefunction(failure_tree)
 
     @node_metadata(edges=["_condition", "_success_tree", "_failure_tree"])
     async def _decision():
-        if bool(await _condition()):
-            return await _success_tree()
+        status = (await _condition()) if _condition_is_async else _condition()
+        if bool(status):
+            return (await _success_tree()) if _success_tree_is_async else _success_tree()
+        if status is RUNNING:
+            return RUNNING
         if _failure_tree:
-            return await _failure_tree()
+            return (await _failure_tree()) if _failure_tree_is_async else _failure_tree()
         return SUCCESS
 
     return _decision
@@ -139,6 +281,7 @@ def repeat_until(condition: CallableFunction, child: CallableFunction) -> AsyncI
     """Repeat child evaluation until condition is truthy.
 
     Return last child evaluation or FAILURE if no evaluation occurs.
+    Return RUNNING as soon as condition or child is running.
 
     Args:
         condition (CallableFunction): awaitable condition
@@ -148,15 +291,20 @@ def repeat_until(condition: CallableFunction, child: CallableFunction) -> AsyncI
         (AsyncInnerFunction): an awaitable function.
     """
 
-    _child = to_async(child)
-    _condition = to_async(condition)
+    _child = child
+    _child_is_async = iscoroutinefunction(child)
+    _condition = condition
+    _condition_is_async = iscoroutinefunction(condition)
 
     @node_metadata(edges=["_condition", "_child"])
     async def _repeat_until():
         result: Any = FAILURE
-        while bool(await _condition()):
-            result = await _child()
-
-        return result
+        while True:
+            status = (await _condition()) if _condition_is_async else _condition()
+            if not bool(status):
+                return RUNNING if status is RUNNING else result
+            result = (await _child()) if _child_is_async else _child()
+            if result is RUNNING:
+                return RUNNING
 
     return _repeat_until
@@ -0,0 +1,69 @@
+"""Deadline module bound evaluation time of a tree.
+
+A deadline is a `time.monotonic()` value carried by a context variable,
+so every node evaluated inside `timeout` (or a `BTreeRunner` with a timeout) can see it.
+Control nodes skip children which would start after the deadline.
+"""
+
+import sys
+from asyncio import get_running_loop
+from collections.abc import Awaitable
+from contextvars import ContextVar
+from time import monotonic
+from typing import Any, Optional
+
+from .definition import ControlFlowException
+
+__all__ = ["current_deadline", "expired", "deadline_exceeded", "wait_until"]
+
+current_deadline: ContextVar[Optional[float]] = ContextVar("current_deadline", default=None)
+"""Deadline of current context, as a monotonic time (None means no deadline)."""
+
+
+def expired() -> bool:
+    """Returns True if deadline of current context is reached."""
+    deadline = current_deadline.get()
+    return deadline is not None and monotonic() >= deadline
+
+
+def deadline_exceeded() -> ControlFlowException:
+    """Returns failure status of a node stopped by a deadline."""
+    return ControlFlowException(TimeoutError("deadline exceeded"))
+
+
+async def wait_until(deadline: float, awaitable: Awaitable[Any]) -> Any:
+    """Await with asyncio or curio, cancel awaitable if deadline is reached.
+
+    Args:
+        deadline (float): monotonic time
+        awaitable (Awaitable[Any]): coroutine to wait
+
+    Returns:
+        (Any): awaitable result.
+
+    Raises:
+        (TimeoutError): if deadline is reached.
+    """
+    try:
+        get_running_loop()
+    except RuntimeError:
+        from curio import TaskTimeout, timeout_after
+
+        try:
+            return await timeout_after(max(deadline - monotonic(), 0), awaitable)
+        except TaskTimeout as e:
+            raise TimeoutError("deadline exceeded") from e
+
+    if sys.version_info >= (3, 11):
+        from asyncio import timeout
+
+        async with timeout(max(deadline - monotonic(), 0)):
+            return await awaitable
+
+    from asyncio import TimeoutError as AsyncioTimeoutError
+    from asyncio import wait_for
+
+    try:
+        return await wait_for(awaitable, max(deadline - monotonic(), 0))
+    except AsyncioTimeoutError as e:
+        raise TimeoutError("deadline exceeded") from e
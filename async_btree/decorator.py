@@ -1,9 +1,22 @@
-"""Decorator module define all decorator function node."""
+"""Decorator module define all decorator function node.
 
-from typing import Any
+Sync child are detected when the node is built and called directly,
+only async child are awaited.
 
+A RUNNING child status is returned as is by all decorators.
+"""
+
+from collections import OrderedDict
+from inspect import iscoroutinefunction
+from random import uniform
+from threading import Lock
+from time import monotonic
+from typing import Any, Callable, NamedTuple, Optional
+
+from .deadline import current_deadline, deadline_exceeded, wait_until
 from .definition import (
     FAILURE,
+    RUNNING,
     SUCCESS,
     AsyncInnerFunction,
     CallableFunction,
@@ -11,7 +24,8 @@ from .definition import (
     alias_node_metadata,
     node_metadata,
 )
-from .utils import to_async
+from .runner import current_tick
+from .utils import join_task, sleep, start_task, task_done
 
 __all__ = [
     "alias",
@@ -23,8 +37,16 @@ __all__ = [
     "is_failure",
     "inverter",
     "retry",
+    "RetryPolicy",
     "retry_until_success",
     "retry_until_failed",
+    "timeout",
+    "RateLimiter",
+    "rate_limit",
+    "throttle",
+    "circuit_breaker",
+    "cached",
+    "single_flight",
 ]
 
 
@@ -39,12 +61,13 @@ def alias(child: CallableFunction, name: str) -> AsyncInnerFunction:
         (AsyncInnerFunction): an awaitable function.
     """
 
-    _child = to_async(child)
+    _child = child
+    _child_is_async = iscoroutinefunction(child)
 
     # we use a dedicted function to 'duplicate' the child reference
     @node_metadata(name=name)
     async def _alias():
-        return await _child()
+        return (await _child()) if _child_is_async else _child()
 
     return _alias
 
@@ -67,12 +90,17 @@ def decorate(child: CallableFunction, decorator: CallableFunction, **kwargs) ->
             return decorator evaluation against child.
     """
 
-    _child = to_async(child)
-    _decorator = to_async(decorator)
+    _child = child
+    _child_is_async = iscoroutinefunction(child)
+    _decorator = decorator
+    _decorator_is_async = iscoroutinefunction(decorator)
 
     @node_metadata(properties=["_decorator"])
     async def _decorate():
-        return await _decorator(await _child(), **kwargs)
+        child_result = (await _child()) if _child_is_async else _child()
+        if _decorator_is_async:
+            return await _decorator(child_result, **kwargs)
+        return _decorator(child_result, **kwargs)
 
     return _decorate
 
@@ -89,12 +117,13 @@ def ignore_exception(child: CallableFunction) -> AsyncInnerFunction:
 
     """
 
-    _child = to_async(child)
+    _child = child
+    _child_is_async = iscoroutinefunction(child)
 
     @node_metadata()
     async def _ignore_exception():
         try:
-            return await _child()
+            return (await _child()) if _child_is_async else _child()
 
         except Exception as e:
             return ControlFlowException.instanciate(e)
@@ -117,22 +146,23 @@ def always_success(child: CallableFunction) -> AsyncInnerFunction:
 
     Returns:
         (AsyncInnerFunction): an awaitable function which return child result if it is truthy
-            else SUCCESS.
+            or RUNNING else SUCCESS.
 
     Raises:
         ControlFlowException : if error occurs
 
     """
 
-    _child = to_async(child)
+    _child = child
+    _child_is_async = iscoroutinefunction(child)
 
     @node_metadata()
     async def _always_success():
         result: Any = SUCCESS
 
         try:
-            child_result = await _child()
-            if bool(child_result):
+            child_result = (await _child()) if _child_is_async else _child()
+            if bool(child_result) or child_result is RUNNING:
                 result = child_result
 
         except Exception as e:
@@ -164,14 +194,15 @@ def always_failure(child: CallableFunction) -> AsyncInnerFunction:  # -> Awaitab
 
     """
 
-    _child = to_async(child)
+    _child = child
+    _child_is_async = iscoroutinefunction(child)
 
     @node_metadata()
     async def _always_failure():
         result: Any = FAILURE
 
         try:
-            child_result = await _child()
+            child_result = (await _child()) if _child_is_async else _child()
             if not bool(child_result):
                 result = child_result
 
@@ -194,11 +225,15 @@ def is_success(child: CallableFunction) -> AsyncInnerFunction:
             return SUCCESS else FAILURE.
     """
 
-    _child = to_async(child)
+    _child = child
+    _child_is_async = iscoroutinefunction(child)
 
     @node_metadata()
     async def _is_success():
-        return SUCCESS if bool(await _child()) else FAILURE
+        child_result = (await _child()) if _child_is_async else _child()
+        if bool(child_result):
+            return SUCCESS
+        return RUNNING if child_result is RUNNING else FAILURE
 
     return _is_success
 
@@ -214,11 +249,15 @@ def is_failure(child: CallableFunction) -> AsyncInnerFunction:
             return FAILURE else FAILURE.
     """
 
-    _child = to_async(child)
+    _child = child
+    _child_is_async = iscoroutinefunction(child)
 
     @node_metadata()
     async def _is_failure():
-        return SUCCESS if not bool(await _child()) else FAILURE
+        child_result = (await _child()) if _child_is_async else _child()
+        if bool(child_result):
+            return FAILURE
+        return RUNNING if child_result is RUNNING else SUCCESS
 
     return _is_failure
 
@@ -234,69 +273,545 @@ def inverter(child: CallableFunction) -> AsyncInnerFunction:
             return FAILURE else SUCCESS
     """
 
-    _child = to_async(child)
+    _child = child
+    _child_is_async = iscoroutinefunction(child)
 
     @node_metadata()
     async def _inverter():
-        return not bool(await _child())
+        child_result = (await _child()) if _child_is_async else _child()
+        return RUNNING if child_result is RUNNING else not bool(child_result)
 
     return _inverter
 
 
-def retry(child: CallableFunction, max_retry: int = 3) -> AsyncInnerFunction:
+class RetryPolicy(NamedTuple):
+    """Delay between two evaluations of a retried child.
+
+    Delay before attempt n + 1 is `delay * factor ** (n - 1)`, bounded by `max_delay`,
+    and shifted by a random amount of at most `jitter * delay`.
+
+    Attributes:
+        delay (float): delay in seconds after first attempt (default 0, no delay).
+        factor (float): delay multiplier between two attempts (default 2, exponential backoff).
+        max_delay (Optional[float]): max delay in seconds (default unbounded).
+        jitter (float): random part of delay, between 0 and 1 (default 0).
+        max_elapsed (Optional[float]): no attempt start after this duration in seconds (default unbounded).
+        retry_on (Optional[Callable[[Any], bool]]): predicate on child result, True to retry
+            (default retry on falsy result).
+    """
+
+    delay: float = 0.0
+    factor: float = 2.0
+    max_delay: Optional[float] = None
+    jitter: float = 0.0
+    max_elapsed: Optional[float] = None
+    retry_on: Optional[Callable[[Any], bool]] = None
+
+    def backoff(self, attempt: int) -> float:
+        """Returns delay in seconds after specified attempt (from 1)."""
+        delay = self.delay * self.factor ** (attempt - 1)
+        if self.max_delay is not None:
+            delay = min(delay, self.max_delay)
+        if self.jitter:
+            delay += delay * self.jitter * uniform(-1, 1)
+        return max(delay, 0.0)
+
+    def should_retry(self, result: Any) -> bool:
+        """Returns True if a child result must be retried."""
+        return self.retry_on(result) if self.retry_on is not None else not bool(result)
+
+    async def wait(self, attempt: int, started: float) -> bool:
+        """Sleep before next attempt.
+
+        Args:
+            attempt (int): number of done attempt
+            started (float): monotonic time of first attempt
+
+        Returns:
+            (bool): False if next attempt would start after max_elapsed or current deadline.
+        """
+        delay = self.backoff(attempt)
+        if self.max_elapsed is not None and monotonic() + delay - started > self.max_elapsed:
+            return False
+        deadline = current_deadline.get()
+        if deadline is not None and monotonic() + delay >= deadline:
+            return False
+        if delay > 0:
+            await sleep(delay)
+        return True
+
+
+def retry(
+    child: CallableFunction,
+    max_retry: int = 3,
+    policy: Optional[RetryPolicy] = None,
+    on_attempt: Optional[Callable[[int, Any], None]] = None,
+) -> AsyncInnerFunction:
     """Retry child evaluation at most max_retry time on failure until child succeed.
 
     Args:
         child (CallableFunction): child function to decorate
         max_retry (int): max retry count (default 3), -1 mean infinite retry
+        policy (Optional[RetryPolicy]): delay and retry condition between two attempts
+            (default retry immediately on failure)
+        on_attempt (Optional[Callable[[int, Any], None]]): function called with attempt number (from 1)
+            and child result after each attempt
 
     Returns:
         (AsyncInnerFunction): an awaitable function which retry child evaluation
             at most max_retry time on failure until child succeed.
             If max_retry is reached, returns FAILURE or last exception.
+            Evaluation stop on a RUNNING child.
     """
     if not (max_retry > 0 or max_retry == -1):
         raise AssertionError("max_retry")
 
-    _child = to_async(child)
+    _child = child
+    _child_is_async = iscoroutinefunction(child)
 
     @node_metadata(properties=["max_retry"])
     async def _retry():
         retry_count = max_retry
+        attempt = 0
+        started = monotonic()
+        deadline = current_deadline.get()
         result: Any = FAILURE
 
-        while not bool(result) and retry_count != 0:
-            result = await _child()
-            print(f"result : {result}")
+        while retry_count != 0:
+            if attempt and deadline is not None and monotonic() >= deadline:
+                break
+            result = (await _child()) if _child_is_async else _child()
+            attempt += 1
+            if on_attempt is not None:
+                on_attempt(attempt, result)
             retry_count -= 1
+            if result is RUNNING or retry_count == 0:
+                break
+            if policy is None:
+                if bool(result):
+                    break
+            elif not policy.should_retry(result) or not await policy.wait(attempt, started):
+                break
 
         return result
 
     return _retry
 
 
-def retry_until_success(child: CallableFunction) -> AsyncInnerFunction:
+def retry_until_success(child: CallableFunction, policy: Optional[RetryPolicy] = None) -> AsyncInnerFunction:
     """Retry child until success.
 
     Args:
         child (CallableFunction): child function to decorate
+        policy (Optional[RetryPolicy]): delay between two attempts (default retry immediately)
 
     Returns:
         (AsyncInnerFunction): an awaitable function which try to evaluate child
             until it succeed.
     """
-    return alias_node_metadata(name="retry_until_success", target=retry(child=child, max_retry=-1))
+    return alias_node_metadata(name="retry_until_success", target=retry(child=child, max_retry=-1, policy=policy))
 
 
-def retry_until_failed(child: CallableFunction) -> AsyncInnerFunction:
+def retry_until_failed(child: CallableFunction, policy: Optional[RetryPolicy] = None) -> AsyncInnerFunction:
     """Retry child until failed.
 
     Args:
         child (CallableFunction): child function to decorate
+        policy (Optional[RetryPolicy]): delay between two attempts (default retry immediately)
 
     Returns:
         (AsyncInnerFunction): an awaitable function which try to evaluate child
             until it failed.
     """
 
-    return alias_node_metadata(name="retry_until_failed", target=retry(child=inverter(child), max_retry=-1))
+    return alias_node_metadata(
+        name="retry_until_failed", target=retry(child=inverter(child), max_retry=-1, policy=policy)
+    )
+
+
+def timeout(child: CallableFunction, seconds: float) -> AsyncInnerFunction:
+    """Bound child evaluation time.
+
+    Child is evaluated with a deadline (see deadline module), the nearest one
+    of this timeout and of an enclosing deadline. On overrun, child is cancelled.
+    A sync child can not be cancelled, it is only not evaluated after deadline.
+
+    Args:
+        child (CallableFunction): child function to decorate
+        seconds (float): max evaluation time in seconds
+
+    Returns:
+        (AsyncInnerFunction): an awaitable function which return child result,
+            or a ControlFlowException of a TimeoutError on overrun.
+
+    Raises:
+        (AssertionError): if seconds is negative.
+    """
+    if seconds < 0:
+        raise AssertionError("seconds")
+
+    _child = child
+    _child_is_async = iscoroutinefunction(child)
+
+    @node_metadata(properties=["seconds"])
+    async def _timeout():
+        deadline = monotonic() + seconds
+        parent = current_deadline.get()
+        if parent is not None:
+            deadline = min(deadline, parent)
+        if monotonic() >= deadline:
+            return deadline_exceeded()
+        token = current_deadline.set(deadline)
+        try:
+            if not _child_is_async:
+                return _child()
+            return await wait_until(deadline, _child())
+        except TimeoutError:
+            return deadline_exceeded()
+        finally:
+            current_deadline.reset(token)
+
+    return _timeout
+
+
+class RateLimiter:
+    """Token bucket shared between nodes and trees (and threads).
+
+    Bucket hold at most `capacity` tokens and is refilled at `rate` tokens per second,
+    refill is computed on each call, without any timer.
+    A waiting call reserve its token in advance, so waiters are served in order
+    with a single sleep each.
+
+    Attributes:
+        rate (float): number of tokens added per second.
+        capacity (float): max number of tokens (burst size).
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """Create a full bucket.
+
+        Args:
+            rate (float): number of tokens added per second
+            capacity (Optional[float]): max number of tokens (default max(rate, 1))
+
+        Raises:
+            (AssertionError): if rate is not positive or capacity is lower than 1
+        """
+        if rate <= 0:
+            raise AssertionError("rate")
+        if capacity is not None and capacity < 1:
+            raise AssertionError("capacity")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = monotonic()
+        self._lock = Lock()
+
+    def __repr__(self):
+        return f"RateLimiter(rate={self.rate}, capacity={self.capacity})"
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    @property
+    def tokens(self) -> float:
+        """Number of available tokens (negative when calls are waiting)."""
+        with self._lock:
+            self._refill(monotonic())
+            return self._tokens
+
+    def try_acquire(self) -> bool:
+        """Take a token if one is available.
+
+        Returns:
+            (bool): True if a token has been taken.
+        """
+        with self._lock:
+            self._refill(monotonic())
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    async def acquire(self) -> bool:
+        """Wait a token.
+
+        Returns:
+            (bool): False if token would be available after current deadline (see timeout).
+        """
+        with self._lock:
+            now = monotonic()
+            self._refill(now)
+            delay = (1 - self._tokens) / self.rate if self._tokens < 1 else 0.0
+            deadline = current_deadline.get()
+            if deadline is not None and now + delay >= deadline:
+                return False
+            self._tokens -= 1
+        if delay > 0:
+            try:
+                await sleep(delay)
+            except BaseException:
+                # give back reserved token
+                with self._lock:
+                    self._tokens += 1
+                raise
+        return True
+
+
+def rate_limit(child: CallableFunction, limiter: RateLimiter, wait: bool = True) -> AsyncInnerFunction:
+    """Evaluate child only with a token of limiter.
+
+    Args:
+        child (CallableFunction): child function to decorate
+        limiter (RateLimiter): a limiter, could be shared between trees
+        wait (bool): wait a token if True (default), else fail fast
+
+    Returns:
+        (AsyncInnerFunction): an awaitable function which return child result,
+            or FAILURE if no token is available and wait is False,
+            or a ControlFlowException of a TimeoutError if token would be available after deadline.
+    """
+
+    _child = child
+    _child_is_async = iscoroutinefunction(child)
+
+    @node_metadata(properties=["limiter", "wait"])
+    async def _rate_limit():
+        if wait:
+            if not await limiter.acquire():
+                return deadline_exceeded()
+        elif not limiter.try_acquire():
+            return FAILURE
+        return (await _child()) if _child_is_async else _child()
+
+    return _rate_limit
+
+
+def throttle(
+    child: CallableFunction,
+    min_interval: Optional[float] = None,
+    wait: bool = True,
+    limiter: Optional[RateLimiter] = None,
+) -> AsyncInnerFunction:
+    """Evaluate child at most once per min_interval seconds.
+
+    To throttle several trees together, build their throttle with a same limiter:
+    ```limiter = RateLimiter(rate=1 / min_interval, capacity=1)```
+
+    Args:
+        child (CallableFunction): child function to decorate
+        min_interval (Optional[float]): min interval in seconds between two evaluations
+        wait (bool): wait end of interval if True (default), else fail fast
+        limiter (Optional[RateLimiter]): a limiter shared between trees, rather than min_interval
+
+    Returns:
+        (AsyncInnerFunction): an awaitable function (see rate_limit).
+
+    Raises:
+        (AssertionError): if min_interval is not positive, or if both or none of min_interval and limiter are set.
+    """
+    if limiter is None:
+        if min_interval is None or min_interval <= 0:
+            raise AssertionError("min_interval")
+        limiter = RateLimiter(rate=1 / min_interval, capacity=1)
+    elif min_interval is not None:
+        raise AssertionError("min_interval")
+    return alias_node_metadata(name="throttle", target=rate_limit(child=child, limiter=limiter, wait=wait))
+
+
+def circuit_breaker(
+    child: CallableFunction, failure_threshold: int = 5, reset_timeout: float = 30.0
+) -> AsyncInnerFunction:
+    """Stop evaluating a child which keep failing.
+
+    Breaker state is visible with `analyze`:
+     - "closed": child is evaluated, after `failure_threshold` consecutive failures breaker is opened
+     - "open": FAILURE is returned without evaluating child, until `reset_timeout` seconds elapsed
+     - "half_open": a single evaluation of child (a probe) is allowed, others calls return FAILURE.
+        Breaker is closed if probe succeed, opened again if it fail
+
+    An exception raised by child is a failure and is raised as is.
+    A RUNNING or cancelled child does not change breaker state.
+
+    Args:
+        child (CallableFunction): child function to decorate
+        failure_threshold (int): number of consecutive failures which open breaker (default 5)
+        reset_timeout (float): duration in seconds of open state (default 30)
+
+    Returns:
+        (AsyncInnerFunction): an awaitable function which return child result, or FAILURE while breaker is open.
+
+    Raises:
+        (AssertionError): if failure_threshold is lower than 1 or reset_timeout is negative.
+    """
+    if failure_threshold < 1:
+        raise AssertionError("failure_threshold")
+    if reset_timeout < 0:
+        raise AssertionError("reset_timeout")
+
+    _child = child
+    _child_is_async = iscoroutinefunction(child)
+    state = "closed"
+    failures = 0
+    opened_at = 0.0
+    probing = False
+
+    @node_metadata(properties=["state", "failures", "failure_threshold", "reset_timeout"])
+    async def _circuit_breaker():
+        nonlocal state, failures, opened_at, probing
+        if state == "open":
+            if monotonic() - opened_at < reset_timeout:
+                return FAILURE
+            state = "half_open"
+        is_probe = state == "half_open"
+        if is_probe:
+            if probing:
+                return FAILURE
+            probing = True
+        # a cancelled call does not change state (parallele cancel its losers)
+        result: Any = None
+        cancelled = True
+        try:
+            result = (await _child()) if _child_is_async else _child()
+            cancelled = False
+            return result
+        except Exception:
+            # an exception is a failure
+            result = FAILURE
+            cancelled = False
+            raise
+        finally:
+            if is_probe:
+                probing = False
+            # result of a call started before breaker opened is ignored, probe decide
+            if not cancelled and (is_probe or state == "closed"):
+                if bool(result):
+                    state = "closed"
+                    failures = 0
+                elif result is not RUNNING:
+                    failures += 1
+                    if is_probe or failures >= failure_threshold:
+                        state = "open"
+                        opened_at = monotonic()
+
+    return _circuit_breaker
+
+
+def cached(
+    child: CallableFunction,
+    key: Optional[Callable[[], Any]] = None,
+    ttl: Optional[float] = None,
+    maxsize: int = 128,
+    per_tick: bool = False,
+) -> AsyncInnerFunction:
+    """Memoize child result.
+
+    Results are kept in a LRU of at most `maxsize` entries, indexed by `key()`.
+    A RUNNING result is not cached, an exception is raised as is and not cached.
+    Cache configuration and hits/misses counters are visible with `analyze`.
+
+    Args:
+        child (CallableFunction): child function to decorate
+        key (Optional[Callable[[], Any]]): function which return cache key of current
+            evaluation (default a single entry)
+        ttl (Optional[float]): time to live of a result in seconds (default no expiration)
+        maxsize (int): max number of cached results (default 128)
+        per_tick (bool): if True, a result is only reused during the same `BTreeRunner.run` call,
+            so a condition used in several branches is evaluated once per tick.
+            Outside a BTreeRunner (no tick), nothing is cached.
+
+    Returns:
+        (AsyncInnerFunction): an awaitable function which return cached child result.
+
+    Raises:
+        (AssertionError): if maxsize is lower than 1 or ttl is not positive.
+    """
+    if maxsize < 1:
+        raise AssertionError("maxsize")
+    if ttl is not None and ttl <= 0:
+        raise AssertionError("ttl")
+
+    _child = child
+    _child_is_async = iscoroutinefunction(child)
+    # key -> (result, tick, expiration)
+    entries: OrderedDict = OrderedDict()
+    hits = misses = 0
+
+    @node_metadata(properties=["key", "ttl", "maxsize", "per_tick", "hits", "misses"])
+    async def _cached():
+        nonlocal hits, misses
+        entry_key = key() if key is not None else None
+        tick = current_tick.get() if per_tick else None
+        if tick == 0:
+            # outside a runner, a tick never ends
+            misses += 1
+            return (await _child()) if _child_is_async else _child()
+        entry = entries.get(entry_key)
+        if entry is not None and entry[1] == tick and (entry[2] is None or monotonic() < entry[2]):
+            entries.move_to_end(entry_key)
+            hits += 1
+            return entry[0]
+        misses += 1
+        result = (await _child()) if _child_is_async else _child()
+        if result is not RUNNING:
+            entries[entry_key] = (result, tick, monotonic() + ttl if ttl is not None else None)
+            entries.move_to_end(entry_key)
+            if len(entries) > maxsize:
+                entries.popitem(last=False)
+        return result
+
+    return _cached
+
+
+def single_flight(child: CallableFunction, key: Optional[Callable[[], Any]] = None) -> AsyncInnerFunction:
+    """Share a single evaluation of child between concurrent callers.
+
+    A caller which find an evaluation in flight (for same key) wait its result
+    rather than starting a new one. Evaluation run in its own task,
+    so cancelling a caller does not cancel others (nor the evaluation).
+
+    Args:
+        child (CallableFunction): child function to decorate
+        key (Optional[Callable[[], Any]]): function which return key of current evaluation
+            (default a single key)
+
+    Returns:
+        (AsyncInnerFunction): an awaitable function which return child result.
+
+    Raises:
+        ControlFlowException : if child raise an exception, raised to all callers
+    """
+    if not iscoroutinefunction(child):
+        # a sync child could not be evaluated concurrently
+        return alias(child=child, name="single_flight")
+
+    _child = child
+    # key -> asyncio future or curio task
+    in_flight: dict[Any, Any] = {}
+
+    @node_metadata(properties=["key"])
+    async def _single_flight():
+        flight_key = key() if key is not None else None
+        flight = in_flight.get(flight_key)
+        if flight is None:
+            started: list = []
+
+            async def _flight():
+                try:
+                    return await _child()
+                finally:
+                    # forget flight when it ends, even if all callers are cancelled
+                    if started and in_flight.get(flight_key) is started[0]:
+                        del in_flight[flight_key]
+
+            flight = await start_task(_flight)
+            started.append(flight)
+            if not task_done(flight):
+                in_flight[flight_key] = flight
+        try:
+            return await join_task(flight)
+        except Exception as e:
+            raise ControlFlowException.instanciate(e)
+
+    return _single_flight
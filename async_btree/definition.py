@@ -15,6 +15,7 @@ Function signature of async function implementation:
 from __future__ import annotations
 
 from collections.abc import Awaitable
+from types import CodeType, FunctionType
 from typing import (
     Any,
     Callable,
@@ -35,12 +36,18 @@ __all__ = [
     "AsyncCallableFunction",
     "SUCCESS",
     "FAILURE",
+    "RUNNING",
+    "Running",
     "ControlFlowException",
     "NodeMetadata",
     "node_metadata",
     "get_node_metadata",
     "alias_node_metadata",
+    "copy_function",
+    "share_node",
     "get_function_name",
+    "get_inner_code",
+    "get_closure_vars",
 ]
 
 
@@ -61,6 +68,25 @@ FAILURE = not SUCCESS  # Well defined falsy...
 """Failure constant."""
 
 
+class Running:
+    """Running status of a node which has not finished yet.
+
+    A running node is not a success, so ```assert Running.__bool__ == False```.
+    Control nodes stop their evaluation on a running child and return RUNNING,
+    decorators and memory nodes resume on next tick.
+    """
+
+    def __bool__(self):
+        return False
+
+    def __repr__(self):
+        return "RUNNING"
+
+
+RUNNING = Running()
+"""Running constant."""
+
+
 class ControlFlowException(Exception):
     """ControlFlowException exception is a decorator on a real exception.
 
@@ -210,6 +236,60 @@ def alias_node_metadata(
     Returns:
         (CallableFunction): function with updated node metadata.
     """
-    dfunc = _attr_decorator(target)
+    # a shared node is not renamed for its other users
+    dfunc = _attr_decorator(copy_function(target) if getattr(target, _SHARED_NODE, False) else target)
     dfunc.__node_metadata = NodeMetadata.alias(name=name, node=dfunc.__node_metadata, properties=properties)
     return dfunc
+
+
+# attribute of a node returned to several callers (see share_node)
+_SHARED_NODE = "__shared_node"
+
+
+def share_node(target: FunctionType) -> FunctionType:
+    """Mark target as shared between several callers, so alias_node_metadata rename a copy of target."""
+    setattr(target, _SHARED_NODE, True)
+    return target
+
+
+def copy_function(target: FunctionType) -> FunctionType:
+    """Returns a copy of a python function, with same code and closure.
+
+    Attributes are copied, except shared mark (see share_node).
+    """
+    function = FunctionType(
+        target.__code__, target.__globals__, target.__name__, target.__defaults__, target.__closure__
+    )
+    function.__kwdefaults__ = target.__kwdefaults__
+    function.__qualname__ = target.__qualname__
+    function.__dict__.update(target.__dict__)
+    function.__dict__.pop(_SHARED_NODE, None)
+    return function
+
+
+def get_inner_code(function: Callable, name: str) -> CodeType:
+    """Returns code object of inner function 'name' declared inside function.
+
+    All closures built by a node function share this code object,
+    so we can recognize which node function built a closure.
+
+    Args:
+        function (Callable): node function (sequence, inverter, ...)
+        name (str): inner function name
+
+    Returns:
+        (CodeType): code object of inner function.
+
+    Raises:
+        (RuntimeError): if no inner function is found.
+    """
+    for const in function.__code__.co_consts:
+        if isinstance(const, CodeType) and const.co_name == name:
+            return const
+    raise RuntimeError(f"{name} not found in {function.__name__}")
+
+
+def get_closure_vars(target: Callable) -> dict[str, Any]:
+    """Returns closure variables of target as a dict name -> value."""
+    cells = target.__closure__ or ()  # type: ignore
+    return {name: cell.cell_contents for name, cell in zip(target.__code__.co_freevars, cells)}  # type: ignore
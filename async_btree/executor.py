@@ -0,0 +1,182 @@
+"""Executor module run sync functions in a pool from asyncio or curio.
+
+Pools are configured per context (see BTreeRunner), or passed to leaves.
+"""
+
+from asyncio import get_running_loop
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextvars import ContextVar
+from functools import partial
+from queue import Full
+from threading import Lock
+from time import monotonic
+from typing import Any, Callable, NamedTuple, Optional
+
+from .utils import run_once
+
+__all__ = [
+    "ThreadPool",
+    "ThreadPoolMetrics",
+    "current_process_pool",
+    "current_thread_pool",
+    "default_process_pool",
+    "default_thread_pool",
+    "run_in_executor",
+]
+
+current_process_pool: ContextVar[Optional[Executor]] = ContextVar("current_process_pool", default=None)
+"""Process pool of current context."""
+
+current_thread_pool: ContextVar[Optional[Executor]] = ContextVar("current_thread_pool", default=None)
+"""Thread pool of current context."""
+
+
+class ThreadPoolMetrics(NamedTuple):
+    """Metrics of a ThreadPool.
+
+    Attributes:
+        queue_depth (int): number of submitted calls waiting for a thread.
+        in_flight (int): number of running calls.
+        submitted (int): number of submitted calls.
+        rejected (int): number of calls rejected because queue was full.
+        completed (int): number of finished calls.
+        max_wait_time (float): max time in seconds spent by a call in queue.
+        total_wait_time (float): total time in seconds spent by calls in queue.
+    """
+
+    queue_depth: int
+    in_flight: int
+    submitted: int
+    rejected: int
+    completed: int
+    max_wait_time: float
+    total_wait_time: float
+
+
+class ThreadPool(Executor):
+    """Thread pool with a bounded queue and metrics.
+
+    When `max_queue` calls are waiting for a thread, `submit` raise `queue.Full`,
+    so a leaf fail rather than pile up work.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_queue: Optional[int] = None):
+        """Create a thread pool.
+
+        Args:
+            max_workers (Optional[int]): max number of threads (see ThreadPoolExecutor)
+            max_queue (Optional[int]): max number of calls waiting for a thread (default unbounded)
+        """
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="async_btree")
+        self._lock = Lock()
+        self._queue_depth = self._in_flight = 0
+        self._submitted = self._rejected = self._completed = 0
+        self._max_wait_time = self._total_wait_time = 0.0
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        with self._lock:
+            if self.max_queue is not None and self._queue_depth >= self.max_queue:
+                self._rejected += 1
+                raise Full("thread pool queue is full")
+            self._queue_depth += 1
+            self._submitted += 1
+        submitted_at = monotonic()
+        started = False
+
+        def _run():
+            nonlocal started
+            wait_time = monotonic() - submitted_at
+            with self._lock:
+                started = True
+                self._queue_depth -= 1
+                self._in_flight += 1
+                self._total_wait_time += wait_time
+                self._max_wait_time = max(self._max_wait_time, wait_time)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+                    self._completed += 1
+
+        def _done(future: Future):
+            # a call cancelled before its start leave the queue
+            with self._lock:
+                if not started:
+                    self._queue_depth -= 1
+
+        try:
+            future = self._executor.submit(_run)
+        except BaseException:
+            with self._lock:
+                self._queue_depth -= 1
+            raise
+        future.add_done_callback(_done)
+        return future
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        self._executor.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+    def metrics(self) -> ThreadPoolMetrics:
+        """Returns a snapshot of pool metrics."""
+        with self._lock:
+            return ThreadPoolMetrics(
+                queue_depth=self._queue_depth,
+                in_flight=self._in_flight,
+                submitted=self._submitted,
+                rejected=self._rejected,
+                completed=self._completed,
+                max_wait_time=self._max_wait_time,
+                total_wait_time=self._total_wait_time,
+            )
+
+
+@run_once
+def default_process_pool() -> Executor:
+    """Returns process pool used when none is configured."""
+    return ProcessPoolExecutor()
+
+
+@run_once
+def default_thread_pool() -> Executor:
+    """Returns thread pool used when none is configured."""
+    return ThreadPool()
+
+
+async def run_in_executor(executor: Executor, target: Callable, *args, **kwargs) -> Any:
+    """Run target in executor and wait its result, with asyncio or curio.
+
+    Args:
+        executor (Executor): thread or process pool
+        target (Callable): sync function (picklable for a process pool)
+        args: optional positional argument to pass on target function
+        kwargs: optional kwargs argument to pass on target function
+
+    Returns:
+        (Any): target result.
+
+    Raises:
+        Exception: any exception raised by target.
+    """
+    call = partial(target, *args, **kwargs) if args or kwargs else target
+    try:
+        loop = get_running_loop()
+    except RuntimeError:
+        return await _curio_run_in_executor(executor, call)
+    return await loop.run_in_executor(executor, call)
+
+
+async def _curio_run_in_executor(executor: Executor, call: Callable) -> Any:
+    # an universal event could be set from pool threads (or process pool management thread)
+    from curio import UniversalEvent
+
+    done = UniversalEvent()
+    future = executor.submit(call)
+    future.add_done_callback(lambda _: done.set())
+    try:
+        await done.wait()
+    except BaseException:
+        future.cancel()
+        raise
+    return future.result()
@@ -1,5 +1,9 @@
 """Leaf definition."""
 
+from concurrent.futures import Executor
+from inspect import iscoroutinefunction
+from typing import Callable, Optional
+
 from .decorator import is_success
 from .definition import (
     AsyncInnerFunction,
@@ -8,9 +12,15 @@ from .definition import (
     alias_node_metadata,
     node_metadata,
 )
-from .utils import to_async
+from .executor import (
+    current_process_pool,
+    current_thread_pool,
+    default_process_pool,
+    default_thread_pool,
+    run_in_executor,
+)
 
-__all__ = ["action", "condition"]
+__all__ = ["action", "condition", "process_action", "threaded_action"]
 
 
 def action(target: CallableFunction, **kwargs) -> AsyncInnerFunction:
@@ -31,12 +41,13 @@ def action(target: CallableFunction, **kwargs) -> AsyncInnerFunction:
 
     """
 
-    _target = to_async(target)
+    _target = target
+    _target_is_async = iscoroutinefunction(target)
 
     @node_metadata(properties=["_target"])
     async def _action():
         try:
-            return await _target(**kwargs)
+            return (await _target(**kwargs)) if _target_is_async else _target(**kwargs)
         except Exception as e:
             raise ControlFlowException.instanciate(e)
 
@@ -60,3 +71,66 @@ def condition(target: CallableFunction, **kwargs) -> AsyncInnerFunction:
         target=is_success(action(target=target, **kwargs)),
         properties=["target"],
     )
+
+
+def process_action(target: Callable, pool: Optional[Executor] = None, **kwargs) -> AsyncInnerFunction:
+    """Declare an action leaf which run target in a process pool.
+
+    The event loop stay responsive while a CPU-bound target run.
+    Target and kwargs must be picklable.
+
+    Args:
+        target (Callable): sync function
+        pool (Optional[Executor]): process pool, default to the process pool of BTreeRunner
+            or to a shared process pool.
+        kwargs: optional kwargs argument to pass on target function
+
+    Returns:
+        (AsyncInnerFunction): an awaitable function.
+
+    Raises:
+        ControlFlowException : if error occurs
+
+    """
+    _target = target
+
+    @node_metadata(properties=["_target"])
+    async def _process_action():
+        try:
+            executor = pool or current_process_pool.get() or default_process_pool()
+            return await run_in_executor(executor, _target, **kwargs)
+        except Exception as e:
+            raise ControlFlowException.instanciate(e)
+
+    return _process_action
+
+
+def threaded_action(target: Callable, executor: Optional[Executor] = None, **kwargs) -> AsyncInnerFunction:
+    """Declare an action leaf which run a blocking target in a thread pool.
+
+    The event loop stay responsive while target wait on I/O.
+
+    Args:
+        target (Callable): sync function
+        executor (Optional[Executor]): thread pool, default to the thread pool of BTreeRunner
+            or to a shared ThreadPool.
+        kwargs: optional kwargs argument to pass on target function
+
+    Returns:
+        (AsyncInnerFunction): an awaitable function.
+
+    Raises:
+        ControlFlowException : if error occurs (`queue.Full` if thread pool queue is full)
+
+    """
+    _target = target
+
+    @node_metadata(properties=["_target"])
+    async def _threaded_action():
+        try:
+            _executor = executor or current_thread_pool.get() or default_thread_pool()
+            return await run_in_executor(_executor, _target, **kwargs)
+        except Exception as e:
+            raise ControlFlowException.instanciate(e)
+
+    return _threaded_action
@@ -0,0 +1,273 @@
+"""Optimizer module define a pass which collapse redundant nodes of a tree.
+
+Trees built with the public api stack wrappers on top of each other:
+`alias` add a pass-through coroutine, `condition` is an `is_success` on an `action`,
+`retry_until_failed` wrap an `inverter`, and `to_async` wrap sync functions (`parallele`, user code).
+
+Each of them cost a coroutine frame on every evaluation.
+`optimize` rewrite a tree into an equivalent but shallower one.
+"""
+
+from inspect import iscoroutinefunction
+from types import FunctionType
+from typing import Any, Callable, NamedTuple, Optional
+
+from . import control, decorator, utils
+from .definition import (
+    AsyncInnerFunction,
+    CallableFunction,
+    NodeMetadata,
+    copy_function,
+    get_closure_vars,
+    get_function_name,
+    get_inner_code,
+)
+
+__all__ = ["optimize", "OptimizedTree"]
+
+
+class OptimizedTree(NamedTuple):
+    """Result of an optimization pass.
+
+    Attributes:
+        target (AsyncInnerFunction): optimized tree.
+        removed_frames (int): number of coroutine frames removed per evaluation.
+    """
+
+    target: AsyncInnerFunction
+    removed_frames: int
+
+
+def _rename(target: CallableFunction, name: str) -> Optional[CallableFunction]:
+    """Returns a copy of target function with an aliased node metadata.
+
+    Returns None if target could not be copied.
+    """
+    if not isinstance(target, FunctionType):
+        return None
+    function = copy_function(target)
+    metadata = getattr(target, "__node_metadata", None)
+    function.__node_metadata = NodeMetadata.alias(name=name, node=metadata) if metadata else NodeMetadata(name=name)
+    return function
+
+
+_IS_SUCCESS = get_inner_code(decorator.is_success, "_is_success")
+_IS_FAILURE = get_inner_code(decorator.is_failure, "_is_failure")
+_INVERTER = get_inner_code(decorator.inverter, "_inverter")
+_TO_ASYNC = get_inner_code(utils.to_async, "_to_async")
+
+# boolean decorators and their negation
+_NEGATION = {_IS_SUCCESS: False, _IS_FAILURE: True, _INVERTER: True}
+
+# closure names of child nodes of rewritten nodes
+_EDGE_NAMES = ["_child", "_children", "_condition", "_success_tree", "_failure_tree"]
+
+
+class _Optimizer:
+    def __init__(self):
+        self.removed_frames = 0
+        # keep shared subtree shared
+        self._memo: dict[int, CallableFunction] = {}
+
+    def optimize(self, target: CallableFunction) -> CallableFunction:
+        key = id(target)
+        if key not in self._memo:
+            rule = _RULES.get(getattr(target, "__code__", None))
+            self._memo[key] = rule(self, target, get_closure_vars(target)) if rule else target
+        return self._memo[key]
+
+    def run(self, tree: CallableFunction) -> CallableFunction:
+        """Optimize tree bottom up without recursion.
+
+        Children are optimized before their parent, so rules find them in memo.
+        """
+        stack = [(tree, False)]
+        while stack:
+            target, expanded = stack.pop()
+            if id(target) in self._memo:
+                continue
+            if expanded:
+                self.optimize(target)
+                continue
+            stack.append((target, True))
+            if getattr(target, "__code__", None) in _RULES:
+                closure = get_closure_vars(target)
+                for name in _EDGE_NAMES:
+                    edges = closure.get(name)
+                    if edges:
+                        stack.extend((child, False) for child in (edges if isinstance(edges, list) else [edges]))
+        return self._memo[id(tree)]
+
+    def rebuild(self, target: CallableFunction, node: CallableFunction) -> CallableFunction:
+        """Keep node metadata of target if it is an alias (fallback, condition, ...).
+
+        Default metadata is not kept, a fused node could be built by another factory.
+        """
+        metadata = getattr(target, "__node_metadata", None)
+        if metadata and metadata.name != get_function_name(target):
+            # setattr avoid private name mangling inside class body
+            setattr(node, "__node_metadata", metadata)
+        return node
+
+
+def _alias(optimizer: _Optimizer, target: CallableFunction, closure: dict[str, Any]) -> CallableFunction:
+    child = optimizer.optimize(closure["_child"])
+    # a sync child could not replace an async node
+    renamed = _rename(child, name=getattr(target, "__node_metadata").name) if iscoroutinefunction(child) else None
+    if renamed is None:
+        return optimizer.rebuild(target, decorator.alias(child=child, name=""))
+    optimizer.removed_frames += 1
+    return renamed
+
+
+def _boolean(optimizer: _Optimizer, target: CallableFunction, closure: dict[str, Any]) -> CallableFunction:
+    code = target.__code__  # type: ignore
+    child = optimizer.optimize(closure["_child"])
+    child_code = getattr(child, "__code__", None)
+    if child_code not in _NEGATION:
+        return optimizer.rebuild(target, _BOOLEAN[code](child))
+    # fuse both nodes in a single one
+    optimizer.removed_frames += 1
+    negation = _NEGATION[code] != _NEGATION[child_code]
+    grand_child = get_closure_vars(child)["_child"]
+    if negation == _NEGATION[code]:
+        return optimizer.rebuild(target, _BOOLEAN[code](grand_child))
+    return optimizer.rebuild(
+        target, decorator.is_failure(grand_child) if negation else decorator.is_success(grand_child)
+    )
+
+
+def _to_async(optimizer: _Optimizer, target: CallableFunction, closure: dict[str, Any]) -> CallableFunction:
+    # parent nodes call sync child directly
+    optimizer.removed_frames += 1
+    return closure["target"]
+
+
+def _children(name: str, factory: Callable[..., CallableFunction], **properties: str):
+    """Rule which rebuild a node with optimized children.
+
+    Args:
+        name (str): closure name of children list
+        factory (Callable[..., CallableFunction]): node function
+        properties (str): factory argument name -> closure name
+    """
+
+    def _rule(optimizer: _Optimizer, target: CallableFunction, closure: dict[str, Any]) -> CallableFunction:
+        children = [optimizer.optimize(child) for child in closure[name]]
+        arguments = {argument: closure[closure_name] for argument, closure_name in properties.items()}
+        return optimizer.rebuild(target, factory(children, **arguments))
+
+    return _rule
+
+
+def _edges(
+    factory: Callable[..., CallableFunction],
+    edges: dict[str, str],
+    properties: Optional[dict[str, str]] = None,
+    kwargs: Optional[str] = None,
+):
+    """Rule which rebuild a node with optimized edges.
+
+    Args:
+        factory (Callable[..., CallableFunction]): node function
+        edges (dict[str, str]): factory argument name -> closure name of child nodes
+        properties (Optional[dict[str, str]]): factory argument name -> closure name of properties
+        kwargs (Optional[str]): closure name of keyword arguments to forward
+    """
+
+    def _rule(optimizer: _Optimizer, target: CallableFunction, closure: dict[str, Any]) -> CallableFunction:
+        arguments = {
+            argument: optimizer.optimize(closure[name]) if closure[name] else None for argument, name in edges.items()
+        }
+        arguments.update({argument: closure[name] for argument, name in (properties or {}).items()})
+        return optimizer.rebuild(target, factory(**arguments, **(closure[kwargs] if kwargs else {})))
+
+    return _rule
+
+
+_BOOLEAN = {_IS_SUCCESS: decorator.is_success, _IS_FAILURE: decorator.is_failure, _INVERTER: decorator.inverter}
+
+_RULES: dict[Any, Callable[[_Optimizer, CallableFunction, dict[str, Any]], CallableFunction]] = {
+    get_inner_code(control.sequence, "_sequence"): _children(
+        "_children", control.sequence, succes_threshold="_succes_threshold", results="_results"
+    ),
+    get_inner_code(control.sequence_with_memory, "_sequence_with_memory"): _children(
+        "_children", control.sequence_with_memory, succes_threshold="_succes_threshold", results="_results"
+    ),
+    get_inner_code(control.decision, "_decision"): _edges(
+        control.decision,
+        edges={"condition": "_condition", "success_tree": "_success_tree", "failure_tree": "_failure_tree"},
+    ),
+    get_inner_code(control.repeat_until, "_repeat_until"): _edges(
+        control.repeat_until, edges={"condition": "_condition", "child": "_child"}
+    ),
+    get_inner_code(decorator.alias, "_alias"): _alias,
+    get_inner_code(decorator.decorate, "_decorate"): _edges(
+        decorator.decorate, edges={"child": "_child"}, properties={"decorator": "_decorator"}, kwargs="kwargs"
+    ),
+    get_inner_code(decorator.ignore_exception, "_ignore_exception"): _edges(
+        decorator.ignore_exception, edges={"child": "_child"}
+    ),
+    get_inner_code(decorator.always_success, "_always_success"): _edges(
+        decorator.always_success, edges={"child": "_child"}
+    ),
+    get_inner_code(decorator.always_failure, "_always_failure"): _edges(
+        decorator.always_failure, edges={"child": "_child"}
+    ),
+    get_inner_code(decorator.retry, "_retry"): _edges(
+        decorator.retry,
+        edges={"child": "_child"},
+        properties={"max_retry": "max_retry", "policy": "policy", "on_attempt": "on_attempt"},
+    ),
+    get_inner_code(decorator.timeout, "_timeout"): _edges(
+        decorator.timeout, edges={"child": "_child"}, properties={"seconds": "seconds"}
+    ),
+    get_inner_code(decorator.circuit_breaker, "_circuit_breaker"): _edges(
+        decorator.circuit_breaker,
+        edges={"child": "_child"},
+        properties={"failure_threshold": "failure_threshold", "reset_timeout": "reset_timeout"},
+    ),
+    get_inner_code(decorator.cached, "_cached"): _edges(
+        decorator.cached,
+        edges={"child": "_child"},
+        properties={"key": "key", "ttl": "ttl", "maxsize": "maxsize", "per_tick": "per_tick"},
+    ),
+    get_inner_code(decorator.single_flight, "_single_flight"): _edges(
+        decorator.single_flight, edges={"child": "_child"}, properties={"key": "key"}
+    ),
+    get_inner_code(decorator.rate_limit, "_rate_limit"): _edges(
+        decorator.rate_limit, edges={"child": "_child"}, properties={"limiter": "limiter", "wait": "wait"}
+    ),
+    _IS_SUCCESS: _boolean,
+    _IS_FAILURE: _boolean,
+    _INVERTER: _boolean,
+    _TO_ASYNC: _to_async,
+}
+
+
+def optimize(tree: CallableFunction) -> OptimizedTree:
+    """Rewrite a behaviour tree into an equivalent but shallower one.
+
+    Applied rewrites:
+     - `alias` nodes are dropped, their name is kept on the child node metadata
+     - stacks of `is_success`, `is_failure` and `inverter` are fused in a single node
+     - `to_async` wrappers are dropped, sync functions are called directly by their parent
+
+    Nodes which are not built by `control`, `decorator` or `leaf` functions
+    (`parallele`, user functions, ...) are left untouched.
+
+    Args:
+        tree (CallableFunction): behaviour tree to optimize
+
+    Returns:
+        (OptimizedTree): optimized tree and number of frames removed per evaluation.
+
+    Example:
+        ```tree, removed_frames = optimize(alias(child=inverter(condition(is_ready)), name="not_ready"))```
+
+    """
+    if getattr(tree, "__code__", None) is _TO_ASYNC:
+        # root must stay awaitable
+        return OptimizedTree(target=tree, removed_frames=0)
+    optimizer = _Optimizer()
+    return OptimizedTree(target=optimizer.run(tree), removed_frames=optimizer.removed_frames)
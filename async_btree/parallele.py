@@ -1,23 +1,106 @@
 """Curiosity module define special construct with curio framework."""
 
-from asyncio import gather
-from typing import Optional
+import sys
+from asyncio import FIRST_COMPLETED, AbstractEventLoop, Future, Task, ensure_future, get_running_loop, wait
+from asyncio import Semaphore as AsyncioSemaphore
+from collections.abc import AsyncIterable, AsyncIterator, Coroutine, Iterable
+from inspect import iscoroutinefunction
+from math import inf
+from typing import Any, Callable, Optional, Union
+from weakref import WeakKeyDictionary
 
 # default to a simple sequence
 from .control import sequence
+from .deadline import deadline_exceeded, expired
 from .definition import (
+    FAILURE,
+    RUNNING,
     AsyncCallableFunction,
     AsyncInnerFunction,
     CallableFunction,
+    ControlFlowException,
     alias_node_metadata,
     node_metadata,
 )
-from .utils import has_curio, to_async
+from .utils import amap, has_curio, to_async
 
-__all__ = ["parallele"]
+__all__ = ["parallele", "parallele_results", "parallele_as_completed", "foreach", "ConcurrencyLimiter", "BACKENDS"]
 
+BACKENDS = ["curio", "asyncio", "taskgroup"]
+"""Available parallele backends."""
 
-def parallele(children: list[CallableFunction], succes_threshold: Optional[int] = None) -> AsyncInnerFunction:
+
+class ConcurrencyLimiter:
+    """Limit number of children running at the same time.
+
+    A limiter could be shared between several parallele nodes or trees of a same backend,
+    with asyncio limit apply per event loop (trees could run with successive runners).
+
+    Attributes:
+        max_concurrency (int): max number of running children.
+        in_flight (int): number of running children.
+    """
+
+    def __init__(self, max_concurrency: int):
+        """Create a limiter.
+
+        Args:
+            max_concurrency (int): max number of running children
+
+        Raises:
+            (AssertionError): if max_concurrency is lower than 1
+        """
+        if max_concurrency < 1:
+            raise AssertionError("max_concurrency")
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        self._curio_semaphore: Any = None
+        # an asyncio semaphore is bound to the first loop which wait on it
+        self._asyncio_semaphores: WeakKeyDictionary = WeakKeyDictionary()
+
+    def _semaphore(self, curio: bool) -> Any:
+        if curio:
+            if self._curio_semaphore is None:
+                from curio import Semaphore
+
+                self._curio_semaphore = Semaphore(self.max_concurrency)
+            return self._curio_semaphore
+        loop = get_running_loop()
+        semaphore = self._asyncio_semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._asyncio_semaphores[loop] = AsyncioSemaphore(self.max_concurrency)
+        return semaphore
+
+    def limit(self, child: AsyncCallableFunction, curio: bool) -> AsyncInnerFunction:
+        """Returns a function which wait a free slot before evaluating child.
+
+        Args:
+            child (AsyncCallableFunction): child to limit
+            curio (bool): True to use curio semaphore, else asyncio semaphore
+
+        Returns:
+            (AsyncInnerFunction): an awaitable function.
+        """
+
+        @node_metadata(edges=["child"])
+        async def _limited():
+            async with self._semaphore(curio):
+                self.in_flight += 1
+                try:
+                    return await child()
+                finally:
+                    self.in_flight -= 1
+
+        return _limited
+
+
+def parallele(
+    children: list[CallableFunction],
+    succes_threshold: Optional[int] = None,
+    max_concurrency: Optional[int] = None,
+    limiter: Optional[ConcurrencyLimiter] = None,
+    backend: Optional[str] = None,
+) -> AsyncInnerFunction:
     """Return an awaitable function which run children in parallele (Concurrently).
 
     `succes_threshold` parameter generalize traditional sequence/fallback,
@@ -27,26 +110,254 @@ def parallele(children: list[CallableFunction], succes_threshold: Optional[int]
 
     if #failure = len(children) - succes_threshold, return a failure
 
+    if succes_threshold is not reached and a child is running, return RUNNING
+
+    As soon as the result is known, remaining children are cancelled.
+    A child which raise an exception is a failure.
+
+    With `max_concurrency` or a shared `limiter`, children are started as slots free up.
+
+    Backend is chosen when the tree is built:
+     - "curio": curio TaskGroup (default if curio is present)
+     - "asyncio": asyncio tasks (default if curio is not present)
+     - "taskgroup": asyncio tasks scoped like a TaskGroup (python >= 3.11), with eager tasks on python >= 3.12,
+        children which finish without suspending are never scheduled.
+
     Args:
         children (list[CallableFunction]): list of Awaitable
         succes_threshold (int): succes threshold value, default len(children)
+        max_concurrency (Optional[int]): max number of running children (default unbounded)
+        limiter (Optional[ConcurrencyLimiter]): a limiter shared with other nodes
+        backend (Optional[str]): one of BACKENDS (default curio if present else asyncio)
 
     Returns:
         (AsyncInnerFunction): an awaitable function.
 
+    Raises:
+        (AssertionError): if succes_threshold, max_concurrency or backend is invalid,
+            or if both max_concurrency and limiter are set.
+        (RuntimeError): if "taskgroup" backend is used with python < 3.11
     """
     _succes_threshold = succes_threshold or len(children)
     if not (0 <= _succes_threshold <= len(children)):
         raise AssertionError("succes_threshold")
+    _backend, _children = _prepare(children, max_concurrency, limiter, backend)
 
-    _parallele_implementation = parallele_curio if has_curio() else parallele_asyncio
+    _parallele_implementation = {
+        "curio": parallele_curio,
+        "asyncio": parallele_asyncio,
+        "taskgroup": parallele_taskgroup,
+    }[_backend]
 
     return _parallele_implementation(
-        children=[to_async(child) for child in children],
+        children=_children,
         succes_threshold=_succes_threshold,
     )
 
 
+def parallele_results(
+    children: list[CallableFunction],
+    max_concurrency: Optional[int] = None,
+    limiter: Optional[ConcurrencyLimiter] = None,
+    backend: Optional[str] = None,
+) -> AsyncInnerFunction:
+    """Return an awaitable function which run children in parallele and return their results.
+
+    Results are ordered like children, an exception is wrapped in a ControlFlowException.
+
+    Args:
+        children (list[CallableFunction]): list of Awaitable
+        max_concurrency (Optional[int]): max number of running children (default unbounded)
+        limiter (Optional[ConcurrencyLimiter]): a limiter shared with other nodes
+        backend (Optional[str]): one of BACKENDS (default curio if present else asyncio)
+
+    Returns:
+        (AsyncInnerFunction): an awaitable function which return the list of children results.
+
+    Raises:
+        (AssertionError): if max_concurrency or backend is invalid,
+            or if both max_concurrency and limiter are set.
+    """
+    _backend, _children = _prepare(children, max_concurrency, limiter, backend)
+    _as_completed = _curio_as_completed if _backend == "curio" else _asyncio_as_completed
+
+    @node_metadata(properties=["_backend"])
+    async def _parallele_results():
+        results: list[Any] = [None] * len(_children)
+        async for index, result in _as_completed(_children):
+            results[index] = result
+        return results
+
+    return _parallele_results
+
+
+def parallele_as_completed(
+    children: list[CallableFunction],
+    max_concurrency: Optional[int] = None,
+    limiter: Optional[ConcurrencyLimiter] = None,
+    backend: Optional[str] = None,
+) -> AsyncInnerFunction:
+    """Return an awaitable function which start children in parallele and return an async iterator.
+
+    The iterator yield tuple (child index, child result) as soon as each child finish,
+    an exception is wrapped in a ControlFlowException.
+    Remaining children are cancelled when the iterator is closed.
+
+    Example:
+        ```async for index, result in await parallele_as_completed(children)(): ...```
+
+    Args:
+        children (list[CallableFunction]): list of Awaitable
+        max_concurrency (Optional[int]): max number of running children (default unbounded)
+        limiter (Optional[ConcurrencyLimiter]): a limiter shared with other nodes
+        backend (Optional[str]): one of BACKENDS (default curio if present else asyncio)
+
+    Returns:
+        (AsyncInnerFunction): an awaitable function which return an async iterator.
+
+    Raises:
+        (AssertionError): if max_concurrency or backend is invalid,
+            or if both max_concurrency and limiter are set.
+    """
+    _backend, _children = _prepare(children, max_concurrency, limiter, backend)
+    _as_completed = _curio_as_completed if _backend == "curio" else _asyncio_as_completed
+
+    @node_metadata(properties=["_backend"])
+    async def _parallele_as_completed():
+        return _as_completed(_children)
+
+    return _parallele_as_completed
+
+
+def foreach(
+    source: Union[AsyncIterable, Iterable, Callable[[], Union[AsyncIterable, Iterable]]],
+    subtree_factory: Callable[[Any], CallableFunction],
+    concurrency: int = 1,
+    succes_threshold: Optional[int] = None,
+) -> AsyncInnerFunction:
+    """Return an awaitable function which evaluate a subtree per item of a source.
+
+    Items are read lazily, at most `concurrency` subtrees run at the same time
+    and the source is not read further ahead.
+
+    Threshold semantics follow `sequence`/`parallele` with an unknown number of children:
+
+    without `succes_threshold`, the first failure return a failure,
+    and the end of source return a success if all subtrees succeed (RUNNING if some are running)
+
+    with `succes_threshold`, #success = succes_threshold return a success,
+    and the end of source return RUNNING if a subtree is running, else a failure.
+
+    As soon as the result is known, the source is no longer read and running subtrees are cancelled.
+    A subtree which raise an exception is a failure.
+
+    Example:
+        ```foreach(fetch_ids, lambda id: sequence([download(id), store(id)]), concurrency=8)```
+
+    Args:
+        source (Union[AsyncIterable, Iterable, Callable]): iterable, async iterable,
+            or a function which return one (called on each evaluation, as async generators are not reusable)
+        subtree_factory (Callable[[Any], CallableFunction]): function which build the subtree of an item
+        concurrency (int): max number of running subtrees (default 1)
+        succes_threshold (Optional[int]): number of success needed (default all items)
+
+    Returns:
+        (AsyncInnerFunction): an awaitable function.
+
+    Raises:
+        (AssertionError): if concurrency is lower than 1 or succes_threshold is negative
+    """
+    if concurrency < 1:
+        raise AssertionError("concurrency")
+    if succes_threshold is not None and succes_threshold < 0:
+        raise AssertionError("succes_threshold")
+
+    async def _evaluate_item(item: Any) -> Any:
+        try:
+            subtree = subtree_factory(item)
+            return (await subtree()) if iscoroutinefunction(subtree) else subtree()
+        except Exception as e:
+            return ControlFlowException.instanciate(e)
+
+    @node_metadata(properties=["concurrency", "succes_threshold"])
+    async def _foreach():
+        # without threshold first failure decide, success threshold is known at end of source
+        status = _Status(inf, inf, failure_threshold=1) if succes_threshold is None else _Status(inf, succes_threshold)
+        if status.decided:
+            return status.value
+        if expired():
+            return deadline_exceeded()
+        results = amap(_evaluate_item, source() if callable(source) else source, concurrency=concurrency, ordered=False)
+        try:
+            async for result in results:
+                status.add(result)
+                if status.decided:
+                    return status.value
+        finally:
+            # cancel running subtrees and stop reading source
+            await results.aclose()
+        if succes_threshold is None:
+            status.succes_threshold = status.success + status.running
+        return status.value
+
+    return _foreach
+
+
+def _prepare(
+    children: list[CallableFunction],
+    max_concurrency: Optional[int],
+    limiter: Optional[ConcurrencyLimiter],
+    backend: Optional[str],
+) -> tuple[str, list[AsyncCallableFunction]]:
+    """Check backend and returns it with children to run (limited if necessary)."""
+    if max_concurrency is not None:
+        if limiter is not None:
+            raise AssertionError("max_concurrency")
+        limiter = ConcurrencyLimiter(max_concurrency=max_concurrency)
+
+    if backend is None:
+        backend = "curio" if has_curio() else "asyncio"
+    if backend not in BACKENDS:
+        raise AssertionError("backend")
+    if backend == "taskgroup" and sys.version_info < (3, 11):
+        raise RuntimeError("taskgroup backend only for python 3.11")
+
+    _children = [to_async(child) for child in children]
+    if limiter is not None:
+        _children = [limiter.limit(child, curio=backend == "curio") for child in _children]
+    return backend, _children
+
+
+class _Status:
+    """Status of a parallele evaluation, decided as soon as possible."""
+
+    def __init__(self, count: float, succes_threshold: float, failure_threshold: Optional[float] = None):
+        self.succes_threshold = succes_threshold
+        # number of failure which make success impossible
+        self.failure_threshold = count - succes_threshold + 1 if failure_threshold is None else failure_threshold
+        self.success = self.failure = self.running = 0
+
+    def add(self, result: Any):
+        if bool(result):
+            self.success += 1
+        elif result is RUNNING:
+            self.running += 1
+        else:
+            self.failure += 1
+
+    @property
+    def decided(self) -> bool:
+        return self.success >= self.succes_threshold or self.failure >= self.failure_threshold
+
+    @property
+    def value(self) -> Any:
+        if self.success >= self.succes_threshold:
+            return True
+        if self.failure >= self.failure_threshold or not self.running:
+            return FAILURE
+        return RUNNING
+
+
 try:
     from curio import TaskGroup
 
@@ -64,16 +375,38 @@ try:
 
         @node_metadata(properties=["succes_threshold"])
         async def _parallele():
-            async with TaskGroup(wait=all) as g:
+            status = _Status(len(children), succes_threshold)
+            if status.decided:
+                return status.value
+            if expired():
+                return deadline_exceeded()
+            # task group cancel remaining tasks on exit
+            async with TaskGroup(wait=None) as g:
                 for child in children:
                     await g.spawn(child)
-
-            success = len(list(filter(bool, g.results)))
-
-            return success >= succes_threshold
+                async for task in g:
+                    status.add(
+                        ControlFlowException.instanciate(task.exception) if task.exception is not None else task.result
+                    )
+                    if status.decided:
+                        break
+            return status.value
 
         return _parallele
 
+    async def _curio_as_completed(children: list[AsyncCallableFunction]) -> AsyncIterator[tuple[int, Any]]:
+        """Yield (index, result) of children as soon as they finish."""
+        # task group cancel remaining tasks on exit
+        async with TaskGroup(wait=None) as g:
+            indexes = {}
+            for index, child in enumerate(children):
+                indexes[await g.spawn(child)] = index
+            async for task in g:
+                yield (
+                    indexes[task],
+                    ControlFlowException.instanciate(task.exception) if task.exception is not None else task.result,
+                )
+
 except Exception:  # pragma: no cover
 
     def parallele_curio(children: list[AsyncCallableFunction], succes_threshold: int) -> AsyncInnerFunction:
@@ -82,6 +415,10 @@ except Exception:  # pragma: no cover
             target=sequence(children=children, succes_threshold=succes_threshold),
         )
 
+    async def _curio_as_completed(children: list[AsyncCallableFunction]) -> AsyncIterator[tuple[int, Any]]:
+        for index, child in enumerate(children):
+            yield index, await child()
+
 
 def parallele_asyncio(children: list[AsyncCallableFunction], succes_threshold: int) -> AsyncInnerFunction:
     """Return an awaitable function which run children in parallele (Concurrently).
@@ -97,8 +434,114 @@ def parallele_asyncio(children: list[AsyncCallableFunction], succes_threshold: i
 
     @node_metadata(properties=["succes_threshold"])
     async def _parallele():
-        results = await gather(*[child() for child in children], return_exceptions=True)
-        success = len(list(filter(bool, results)))
-        return success >= succes_threshold
+        status = _Status(len(children), succes_threshold)
+        if status.decided:
+            return status.value
+        if expired():
+            return deadline_exceeded()
+        pending = {ensure_future(child()) for child in children}
+        try:
+            while pending and not status.decided:
+                done, pending = await wait(pending, return_when=FIRST_COMPLETED)
+                for task in done:
+                    status.add(_task_result(task))
+        finally:
+            # cancel remaining children and wait their cleanup
+            for task in pending:
+                task.cancel()
+            if pending:
+                await wait(pending)
+        return status.value
 
     return _parallele
+
+
+def parallele_taskgroup(children: list[AsyncCallableFunction], succes_threshold: int) -> AsyncInnerFunction:
+    """Return an awaitable function which run children in a scope of asyncio tasks.
+
+    As in an asyncio TaskGroup, remaining children are cancelled and awaited before returning.
+    On python >= 3.12, children are started as eager tasks (unless loop has a custom task factory):
+    a child which finish without suspending is never scheduled on the event loop.
+
+    Args:
+        children (list[CallableFunction]): list of Awaitable
+        succes_threshold (int): succes threshold value, default len(children)
+
+    Returns:
+        (AsyncInnerFunction): an awaitable function.
+
+    """
+
+    @node_metadata(properties=["succes_threshold"])
+    async def _parallele():
+        status = _Status(len(children), succes_threshold)
+        if status.decided:
+            return status.value
+        if expired():
+            return deadline_exceeded()
+        loop = get_running_loop()
+        pending = set()
+        try:
+            for child in children:
+                task = _create_task(loop, _evaluate(child))
+                if not task.done():
+                    pending.add(task)
+                    continue
+                status.add(task.result())
+                if status.decided:
+                    break
+            while pending and not status.decided:
+                done, pending = await wait(pending, return_when=FIRST_COMPLETED)
+                for task in done:
+                    status.add(task.result())
+        finally:
+            # cancel remaining children and wait their cleanup
+            for task in pending:
+                task.cancel()
+            if pending:
+                await wait(pending)
+        return status.value
+
+    return _parallele
+
+
+async def _evaluate(child: AsyncCallableFunction) -> Any:
+    """Evaluate child, an exception is a falsy ControlFlowException."""
+    try:
+        return await child()
+    except Exception as e:
+        return ControlFlowException.instanciate(e)
+
+
+def _create_task(loop: AbstractEventLoop, coro: Coroutine) -> Future:
+    """Create an eager task if available (python >= 3.12), without changing loop task factory."""
+    if sys.version_info < (3, 12) or loop.get_task_factory() is not None:
+        return loop.create_task(coro)
+    return Task(coro, loop=loop, eager_start=True)  # pyright: ignore[reportCallIssue]
+
+
+async def _asyncio_as_completed(children: list[AsyncCallableFunction]) -> AsyncIterator[tuple[int, Any]]:
+    """Yield (index, result) of children as soon as they finish."""
+    indexes = {ensure_future(child()): index for index, child in enumerate(children)}
+    pending = set(indexes)
+    try:
+        while pending:
+            done, pending = await wait(pending, return_when=FIRST_COMPLETED)
+            for task in sorted(done, key=indexes.__getitem__):
+                yield indexes[task], _task_result(task)
+    finally:
+        # cancel remaining children and wait their cleanup
+        for task in pending:
+            task.cancel()
+        if pending:
+            await wait(pending)
+
+
+def _task_result(task: Future) -> Any:
+    """Returns result of a finished task, an exception is a falsy ControlFlowException."""
+    error = task.exception()
+    if error is None:
+        return task.result()
+    if isinstance(error, Exception):
+        return ControlFlowException.instanciate(error)
+    raise error
@@ -0,0 +1,214 @@
+"""Pipeline module define a streaming pipeline of map and filter stages.
+
+Unlike a chain of `amap` and `afilter`, where each step wait the previous one,
+each stage run its own workers and stages are connected by bounded queues,
+so stages overlap their I/O. It works with asyncio and curio.
+"""
+
+from asyncio import get_running_loop
+from collections.abc import AsyncIterable, AsyncIterator, Iterable
+from functools import partial
+from inspect import iscoroutinefunction
+from time import monotonic
+from typing import Any, Callable, NamedTuple, Optional, Union
+
+from .definition import get_function_name
+from .utils import _aiter, cancel_task, start_task
+
+__all__ = ["Pipeline", "StageMetrics"]
+
+# end of stream marker
+_DONE = object()
+# item rejected by a filter stage
+_DROPPED = object()
+
+
+class StageMetrics(NamedTuple):
+    """Metrics of a pipeline stage.
+
+    Attributes:
+        name (str): stage name.
+        concurrency (int): number of stage workers.
+        processed (int): number of items processed by stage.
+        in_flight (int): number of items being processed.
+        queue_depth (int): number of items waiting in stage input queue.
+        throughput (float): processed items per second since pipeline start.
+    """
+
+    name: str
+    concurrency: int
+    processed: int
+    in_flight: int
+    queue_depth: int
+    throughput: float
+
+
+class _Stage:
+    def __init__(self, name: str, func: Callable, concurrency: int, keep: bool):
+        self.name = name
+        self.func = func
+        self.func_is_async = iscoroutinefunction(func)
+        self.concurrency = concurrency
+        # True for a filter stage
+        self.keep = keep
+        self.queue: Any = None
+        self.workers = 0
+        self.processed = self.in_flight = 0
+
+    async def apply(self, item: Any) -> Any:
+        result = (await self.func(item)) if self.func_is_async else self.func(item)
+        if self.keep:
+            return item if result else _DROPPED
+        return result
+
+
+class Pipeline:
+    """Streaming pipeline of map and filter stages connected by bounded queues.
+
+    Each stage run `concurrency` workers, with more than one worker a stage does not keep items order.
+    The first exception raised by a stage stop the pipeline and is raised to the consumer.
+    Stopping iteration (or cancelling consumer) cancel all workers,
+    with curio an interrupted iteration must be closed with `aclose()` (see `curio.meta.finalize`).
+
+    Example:
+        ```
+        pipeline = Pipeline(source).map(fetch, concurrency=8).filter(is_valid).map(store, concurrency=2)
+        async for item in pipeline:
+            ...
+        ```
+    """
+
+    def __init__(self, source: Union[AsyncIterable, Iterable], queue_size: int = 16):
+        """Create a pipeline.
+
+        Args:
+            source (Union[AsyncIterable, Iterable]): iterable or async iterable of items
+            queue_size (int): max number of items waiting between two stages (default 16)
+
+        Raises:
+            (AssertionError): if queue_size is lower than 1
+        """
+        if queue_size < 1:
+            raise AssertionError("queue_size")
+        self._source = source
+        self._queue_size = queue_size
+        self._stages: list[_Stage] = []
+        self._started = 0.0
+        self._error: Optional[BaseException] = None
+        self._output: Any = None
+
+    def map(self, func: Callable, concurrency: int = 1, name: Optional[str] = None) -> "Pipeline":
+        """Add a stage which replace each item by func(item).
+
+        Args:
+            func (Callable): sync or async function
+            concurrency (int): number of workers (default 1)
+            name (Optional[str]): stage name (default function name)
+
+        Returns:
+            (Pipeline): this pipeline.
+        """
+        return self._add(func, concurrency, name, keep=False)
+
+    def filter(self, func: Callable, concurrency: int = 1, name: Optional[str] = None) -> "Pipeline":
+        """Add a stage which keep items which satisfy func(item).
+
+        Args:
+            func (Callable): sync or async predicate
+            concurrency (int): number of workers (default 1)
+            name (Optional[str]): stage name (default function name)
+
+        Returns:
+            (Pipeline): this pipeline.
+        """
+        return self._add(func, concurrency, name, keep=True)
+
+    def _add(self, func: Callable, concurrency: int, name: Optional[str], keep: bool) -> "Pipeline":
+        if concurrency < 1:
+            raise AssertionError("concurrency")
+        self._stages.append(_Stage(name or get_function_name(func), func, concurrency, keep))
+        return self
+
+    def metrics(self) -> list[StageMetrics]:
+        """Returns a snapshot of stage metrics."""
+        elapsed = monotonic() - self._started if self._started else 0.0
+        return [
+            StageMetrics(
+                name=stage.name,
+                concurrency=stage.concurrency,
+                processed=stage.processed,
+                in_flight=stage.in_flight,
+                queue_depth=stage.queue.qsize() if stage.queue is not None else 0,
+                throughput=stage.processed / elapsed if elapsed else 0.0,
+            )
+            for stage in self._stages
+        ]
+
+    async def __aiter__(self) -> AsyncIterator[Any]:
+        try:
+            get_running_loop()
+            from asyncio import Queue
+        except RuntimeError:
+            from curio import Queue  # type: ignore[assignment]
+
+        self._started = monotonic()
+        self._error = None
+        for stage in self._stages:
+            stage.queue = Queue(maxsize=self._queue_size)
+            stage.workers = stage.concurrency
+            stage.processed = stage.in_flight = 0
+        output = self._output = Queue(maxsize=self._queue_size)
+        # input queue of each stage, then pipeline output
+        queues = [stage.queue for stage in self._stages] + [output]
+
+        tasks = [await start_task(partial(self._feed, queues[0]))]
+        for stage, stage_output in zip(self._stages, queues[1:]):
+            for _ in range(stage.concurrency):
+                tasks.append(await start_task(partial(self._work, stage, stage_output)))
+        try:
+            while True:
+                item = await output.get()
+                if self._error is not None:
+                    raise self._error
+                if item is _DONE:
+                    break
+                yield item
+        finally:
+            for task in tasks:
+                await cancel_task(task)
+
+    async def _feed(self, queue: Any):
+        try:
+            async for item in _aiter(self._source):
+                await queue.put(item)
+            await queue.put(_DONE)
+        except Exception as e:
+            await self._fail(e)
+
+    async def _work(self, stage: _Stage, output: Any):
+        try:
+            while True:
+                item = await stage.queue.get()
+                if item is _DONE:
+                    # wake up next worker, last one close next stage
+                    await stage.queue.put(_DONE)
+                    stage.workers -= 1
+                    if not stage.workers:
+                        await output.put(_DONE)
+                    return
+                stage.in_flight += 1
+                try:
+                    result = await stage.apply(item)
+                finally:
+                    stage.in_flight -= 1
+                stage.processed += 1
+                if result is not _DROPPED:
+                    await output.put(result)
+        except Exception as e:
+            await self._fail(e)
+
+    async def _fail(self, error: BaseException):
+        if self._error is None:
+            self._error = error
+            # wake up consumer
+            await self._output.put(_DONE)
@@ -1,13 +1,23 @@
 import sys
 from collections.abc import Awaitable
-from contextvars import Context, copy_context
-from typing import Callable, ContextManager, Optional, TypeVar
-
+from concurrent.futures import Executor
+from contextvars import Context, ContextVar, copy_context
+from itertools import count
+from time import monotonic
+from typing import Any, Callable, ContextManager, Optional, TypeVar
+
+from .deadline import current_deadline, deadline_exceeded, wait_until
+from .executor import current_process_pool, current_thread_pool
 from .utils import has_curio
 
 R = TypeVar("R", covariant=True)
 
-__all__ = ["BTreeRunner"]
+__all__ = ["BTreeRunner", "current_tick"]
+
+current_tick: ContextVar[int] = ContextVar("current_tick", default=0)
+"""Identifier of current BTreeRunner.run call (0 outside a runner)."""
+
+_ticks = count(1)
 
 
 class BTreeRunner:
@@ -24,16 +34,29 @@ class BTreeRunner:
 
     """
 
-    def __init__(self, disable_curio: bool = False) -> None:
+    def __init__(
+        self,
+        disable_curio: bool = False,
+        process_pool: Optional[Executor] = None,
+        thread_pool: Optional[Executor] = None,
+        timeout: Optional[float] = None,
+    ) -> None:
         """Create a runner to call ultiple async btree function in same context from existing sync framework.
 
         Args:
             disable_curio (bool, optional): Force usage of `asyncio` Defaults to False.
+            process_pool (Optional[Executor], optional): process pool used by `process_action`. Defaults to None.
+            thread_pool (Optional[Executor], optional): thread pool used by `threaded_action`. Defaults to None.
+            timeout (Optional[float], optional): max duration in seconds of each run, see `timeout` decorator.
+                Defaults to None.
 
         Raises:
             RuntimeError: if python version is below 3.11 and disable_curio is set.
         """
         self._has_curio = has_curio() and not disable_curio
+        self._process_pool = process_pool
+        self._thread_pool = thread_pool
+        self._timeout = timeout
         self._context: Optional[Context] = None
         # curio support
         self._kernel: Optional[ContextManager] = None
@@ -44,6 +67,10 @@ class BTreeRunner:
 
     def __enter__(self):
         self._context = copy_context()
+        if self._process_pool:
+            self._context.run(current_process_pool.set, self._process_pool)
+        if self._thread_pool:
+            self._context.run(current_thread_pool.set, self._thread_pool)
 
         if self._has_curio:
             from curio import Kernel
@@ -79,7 +106,25 @@ class BTreeRunner:
         """
         if not self._kernel:
             raise RuntimeError("run method must be invoked inside a context.")
+        self._context.run(current_tick.set, next(_ticks))  # type: ignore
         coro = target(*args, **kwargs)
+        if self._timeout is None:
+            return self._run(coro)
+        deadline = monotonic() + self._timeout
+        token = self._context.run(current_deadline.set, deadline)  # type: ignore
+        try:
+            return self._run(_run_until(deadline, coro))
+        finally:
+            self._context.run(current_deadline.reset, token)  # type: ignore
+
+    def _run(self, coro: Awaitable[Any]) -> Any:
         if self._has_curio:
             return self._context.run(self._kernel.run, coro)  # type: ignore
         return self._kernel.run(coro, context=self._context)  # type: ignore
+
+
+async def _run_until(deadline: float, coro: Awaitable[Any]) -> Any:
+    try:
+        return await wait_until(deadline, coro)
+    except TimeoutError:
+        return deadline_exceeded()
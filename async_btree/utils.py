@@ -1,39 +1,99 @@
 """Utility function."""
 
-from collections.abc import AsyncGenerator, AsyncIterable, Awaitable, Iterable
+from asyncio import FIRST_COMPLETED, Future, ensure_future, get_running_loop, shield, wait
+from asyncio import sleep as asyncio_sleep
+from collections import OrderedDict
+from collections.abc import AsyncGenerator, AsyncIterable, AsyncIterator, Awaitable, Iterable
+from concurrent.futures import Executor
 from contextvars import copy_context
-from functools import wraps
+from functools import partial, wraps
 from inspect import iscoroutinefunction
-from typing import Any, Callable, TypeVar, Union
+from threading import Event, Lock, get_ident
+from time import monotonic
+from types import FunctionType
+from typing import Any, Callable, Optional, TypeVar, Union
 from warnings import warn
+from weakref import WeakKeyDictionary, ref
+
+from .definition import CallableFunction, get_function_name, node_metadata, share_node
+
+__all__ = [
+    "amap",
+    "afilter",
+    "amap_batched",
+    "afilter_batched",
+    "run",
+    "to_async",
+    "has_curio",
+    "run_once",
+    "sleep",
+    "start_task",
+    "join_task",
+    "task_done",
+    "wait_task",
+    "cancel_task",
+]
 
-from .definition import CallableFunction, node_metadata
+T = TypeVar("T")
 
-__all__ = ["amap", "afilter", "run", "to_async", "has_curio", "run_once"]
+_MISSING = object()
 
-T = TypeVar("T")
+# function -> weak reference to its to_async wrapper (wrapper keep function alive, not the reverse)
+_to_async_wrappers: WeakKeyDictionary = WeakKeyDictionary()
 
 
 async def amap(
-    corofunc: Callable[[Any], Awaitable[T]], iterable: Union[AsyncIterable, Iterable]
+    corofunc: Callable[[Any], Awaitable[T]],
+    iterable: Union[AsyncIterable, Iterable],
+    concurrency: Optional[int] = None,
+    ordered: bool = True,
 ) -> AsyncGenerator[T, None]:
     """Map an async function onto an iterable or an async iterable.
 
     This simplify writing of mapping a function on something iterable
     between 'async for ...' and 'for...' .
 
+    With `concurrency`, at most `concurrency` calls run at the same time (each in its own task),
+    and source is not read further ahead (backpressure).
+    If a call raise an exception, other calls are cancelled and exception is raised,
+    closing iterator (`aclose()`) cancel calls in flight.
+
     Args:
         corofunc (Callable[[Any], Awaitable[T]]): coroutine function
         iterable (Union[AsyncIterable, Iterable]): iterable or async iterable collection
             which will be applied.
+        concurrency (Optional[int]): max number of concurrent calls (default None, one call at a time)
+        ordered (bool): yield results in input order if True (default), else in completion order
 
     Returns:
         AsyncGenerator[T]: an async iterator of corofunc(item)
 
+    Raises:
+        (AssertionError): if concurrency is lower than 1
+
     Example:
         ```[i async for i in amap(inc, afilter(even, [0, 1, 2, 3, 4]))]```
 
     """
+    if concurrency is not None:
+        if concurrency < 1:
+            raise AssertionError("concurrency")
+        try:
+            get_running_loop()
+            implementation = _asyncio_amap
+        except RuntimeError:
+            implementation = _curio_amap
+        items = _aiter(iterable)
+        results = implementation(corofunc, items, concurrency, ordered)
+        try:
+            async for result in results:
+                yield result
+        finally:
+            # closing amap cancel calls in flight and stop reading source
+            await results.aclose()
+            await items.aclose()
+        return
+
     if isinstance(iterable, AsyncIterable):
         async for item in iterable:
             yield await corofunc(item)
@@ -42,6 +102,99 @@ async def amap(
             yield await corofunc(item)
 
 
+async def _aiter(iterable: Union[AsyncIterable, Iterable]) -> AsyncIterator:
+    if isinstance(iterable, AsyncIterable):
+        async for item in iterable:
+            yield item
+    else:
+        for item in iterable:
+            yield item
+
+
+class _Window:
+    """Indexes of calls in flight, and results waiting their turn in ordered mode."""
+
+    def __init__(self, concurrency: int, ordered: bool):
+        self.concurrency = concurrency
+        self.ordered = ordered
+        self.indexes: dict[Any, int] = {}
+        self.results: dict[int, Any] = {}
+        self.started = self.yielded = 0
+        self.exhausted = False
+
+    async def fill(self, items: AsyncIterator, spawn: Callable[[Any], Awaitable[Any]]):
+        """Start calls until window is full or source is exhausted."""
+        while not self.exhausted and self.started - self.yielded < self.concurrency:
+            try:
+                item = await items.__anext__()
+            except StopAsyncIteration:
+                self.exhausted = True
+                break
+            self.indexes[await spawn(item)] = self.started
+            self.started += 1
+
+    def done(self, task: Any, result: Any) -> list:
+        """Returns results to yield once task is done."""
+        index = self.indexes.pop(task)
+        if not self.ordered:
+            self.yielded += 1
+            return [result]
+        self.results[index] = result
+        ready = []
+        while self.yielded in self.results:
+            ready.append(self.results.pop(self.yielded))
+            self.yielded += 1
+        return ready
+
+
+async def _asyncio_amap(
+    corofunc: Callable[[Any], Awaitable[Any]], items: AsyncIterator, concurrency: int, ordered: bool
+) -> AsyncIterator:
+    window = _Window(concurrency, ordered)
+
+    async def _spawn(item):
+        return ensure_future(corofunc(item))
+
+    try:
+        while True:
+            await window.fill(items, _spawn)
+            if not window.indexes:
+                break
+            done, _ = await wait(window.indexes, return_when=FIRST_COMPLETED)
+            for task in sorted(done, key=window.indexes.__getitem__):
+                for result in window.done(task, task.result()):
+                    yield result
+    finally:
+        # cancel remaining calls and wait their cleanup
+        for task in window.indexes:
+            task.cancel()
+        if window.indexes:
+            await wait(window.indexes)
+
+
+async def _curio_amap(
+    corofunc: Callable[[Any], Awaitable[Any]], items: AsyncIterator, concurrency: int, ordered: bool
+) -> AsyncIterator:
+    from curio import TaskGroup
+
+    window = _Window(concurrency, ordered)
+    # task group cancel remaining calls on exit
+    async with TaskGroup(wait=None) as g:
+
+        async def _spawn(item):
+            return await g.spawn(corofunc, item)
+
+        while True:
+            await window.fill(items, _spawn)
+            if not window.indexes:
+                break
+            task = await g.next_done()
+            if task.exception is not None:
+                raise task.exception
+            for result in window.done(task, task.result):
+                yield result
+
+
 async def afilter(
     corofunc: Callable[[Any], Awaitable[bool]], iterable: Union[AsyncIterable, Iterable]
 ) -> AsyncGenerator[Any, None]:
@@ -72,11 +225,138 @@ async def afilter(
                 yield item
 
 
-def to_async(target: CallableFunction) -> Callable[..., Awaitable[Any]]:
+async def amap_batched(
+    func: Callable[[list], Any],
+    iterable: Union[AsyncIterable, Iterable],
+    batch_size: int,
+    flush_timeout: Optional[float] = None,
+) -> AsyncGenerator[Any, None]:
+    """Map a function onto chunks of an iterable or an async iterable.
+
+    Items are grouped in chunks of at most `batch_size` items,
+    func is called once per chunk and must return a result per item.
+
+    Args:
+        func (Callable[[list], Any]): sync or async function which return an iterable of results of a chunk
+        iterable (Union[AsyncIterable, Iterable]): iterable or async iterable collection
+            which will be applied.
+        batch_size (int): max number of items per chunk
+        flush_timeout (Optional[float]): with an async iterable, max time in seconds to wait items
+            of an incomplete chunk (default None, wait a full chunk)
+
+    Returns:
+        (AsyncGenerator[Any]): an async iterator of results, item by item.
+
+    Raises:
+        (AssertionError): if batch_size is lower than 1
+
+    Example:
+        ```[i async for i in amap_batched(lambda chunk: [i + 1 for i in chunk], range(10), batch_size=4)]```
+
+    """
+    func_is_async = iscoroutinefunction(func)
+    async for batch in _batches(iterable, batch_size, flush_timeout):
+        for result in (await func(batch)) if func_is_async else func(batch):
+            yield result
+
+
+async def afilter_batched(
+    func: Callable[[list], Any],
+    iterable: Union[AsyncIterable, Iterable],
+    batch_size: int,
+    flush_timeout: Optional[float] = None,
+) -> AsyncGenerator[Any, None]:
+    """Filter chunks of an iterable or an async iterable.
+
+    Items are grouped in chunks of at most `batch_size` items,
+    func is called once per chunk and must return a boolean per item.
+
+    Args:
+        func (Callable[[list], Any]): sync or async function which return an iterable of booleans of a chunk
+        iterable (Union[AsyncIterable, Iterable]): iterable or async iterable collection
+            which will be applied.
+        batch_size (int): max number of items per chunk
+        flush_timeout (Optional[float]): with an async iterable, max time in seconds to wait items
+            of an incomplete chunk (default None, wait a full chunk)
+
+    Returns:
+        (AsyncGenerator[Any]): an async iterator of items which satisfy func.
+
+    Raises:
+        (AssertionError): if batch_size is lower than 1
+    """
+    func_is_async = iscoroutinefunction(func)
+    async for batch in _batches(iterable, batch_size, flush_timeout):
+        for item, keep in zip(batch, (await func(batch)) if func_is_async else func(batch)):
+            if keep:
+                yield item
+
+
+async def _batches(
+    iterable: Union[AsyncIterable, Iterable], batch_size: int, flush_timeout: Optional[float]
+) -> AsyncIterator[list]:
+    """Group items in lists of at most batch_size items."""
+    if batch_size < 1:
+        raise AssertionError("batch_size")
+    if flush_timeout is None or not isinstance(iterable, AsyncIterable):
+        batch = []
+        async for item in _aiter(iterable):
+            batch.append(item)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+        return
+
+    # next item is read in a task, so we could stop waiting it to flush a batch
+    iterator = iterable.__aiter__()
+
+    async def _next():
+        try:
+            return await iterator.__anext__()
+        except StopAsyncIteration:
+            return _MISSING
+
+    batch = []
+    flush_at = 0.0
+    pending = None
+    try:
+        while True:
+            if pending is None:
+                pending = await start_task(_next)
+            if batch and not await wait_task(pending, timeout=max(flush_at - monotonic(), 0)):
+                yield batch
+                batch = []
+                continue
+            # pending is cleared once done, so a cancelled join still cancel it
+            item = await join_task(pending)
+            pending = None
+            if item is _MISSING:
+                break
+            if not batch:
+                flush_at = monotonic() + flush_timeout
+            batch.append(item)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    finally:
+        if pending is not None:
+            await cancel_task(pending)
+
+
+def to_async(target: CallableFunction, executor: Optional[Executor] = None) -> Callable[..., Awaitable[Any]]:
     """Transform target function in async function if necessary.
 
+    Wrapper of a python function (or partial) is shared: while a wrapper is in use,
+    wrapping same target again return same wrapper (aliasing it with `alias_node_metadata` rename a copy).
+
     Args:
         target (CallableFunction): function to transform in async if necessary
+        executor (Optional[Executor]): if set, a sync target is called inside this executor
+            rather than on event loop thread (see ThreadPool)
 
     Returns:
         (Callable[..., Awaitable[Any]]): an async version of target function
@@ -86,51 +366,225 @@ def to_async(target: CallableFunction) -> Callable[..., Awaitable[Any]]:
         # nothing todo
         return target
 
+    if executor is not None:
+        from .executor import run_in_executor
+
+        @node_metadata(name=target.__name__.lstrip("_") if hasattr(target, "__name__") else "anonymous")
+        async def _in_executor(*args, **kwargs):
+            return await run_in_executor(executor, target, *args, **kwargs)
+
+        return _in_executor
+
+    # a bound method is a new object on each access, only functions keep their wrapper
+    cacheable = isinstance(target, (FunctionType, partial))
+    if cacheable:
+        wrapper_ref = _to_async_wrappers.get(target)
+        wrapper = wrapper_ref() if wrapper_ref is not None else None
+        if wrapper is not None:
+            return wrapper
+
     # use node_metadata to keep trace of target function name
     @node_metadata(name=target.__name__.lstrip("_") if hasattr(target, "__name__") else "anonymous")
     async def _to_async(*args, **kwargs):
         return target(*args, **kwargs)
 
+    if cacheable:
+        _to_async_wrappers[target] = ref(share_node(_to_async))
     return _to_async
 
 
-def run_once(target: CallableFunction) -> CallableFunction:
+def run_once(
+    target: Optional[CallableFunction] = None,
+    keyed: bool = False,
+    maxsize: Optional[int] = None,
+    ttl: Optional[float] = None,
+) -> Any:
     """Implemet 'run once' function.
 
     The target function is call exactly once. Any fuher call will return the first result.
-    This decorator works on async and sync function.
+    This decorator works on async and sync function, as `@run_once` or `@run_once(...)`.
+
+    Concurrent callers of an async target share the pending result (target run in its own task),
+    concurrent callers of a sync target wait the first one (of same key),
+    and a sync target which call itself (for same key) raise a RuntimeError rather than deadlock.
+    An exception is raised to callers and nothing is kept, next call will try again.
+    Decorated function has a `reset()` method which forget all results.
 
     Args:
-        target (CallableFunction): target function
+        target (Optional[CallableFunction]): target function
+        keyed (bool): if True, target is call once per arguments (default False)
+        maxsize (Optional[int]): max number of results kept when keyed, least recently used are dropped
+            (default unbounded)
+        ttl (Optional[float]): time to live of a result in seconds (default no expiration)
 
     Returns:
-        CallableFunction: decorated run once function.
+        CallableFunction: decorated run once function (or a decorator if target is None).
+
+    Raises:
+        (AssertionError): if maxsize is lower than 1 or ttl is not positive.
+        (RuntimeError): if a sync target call itself (for same key).
     """
-    _result = None
-    _has_run = False
+    if maxsize is not None and maxsize < 1:
+        raise AssertionError("maxsize")
+    if ttl is not None and ttl <= 0:
+        raise AssertionError("ttl")
+    if target is None:
+        return partial(run_once, keyed=keyed, maxsize=maxsize, ttl=ttl)
+
+    # key -> (result, expiration)
+    _results: OrderedDict = OrderedDict()
+    # key -> asyncio future or curio task, or (thread ident, Event) of a sync target call
+    _in_flight: dict[Any, Any] = {}
+    _lock = Lock()
+
+    def _key(args: tuple, kwargs: dict) -> Any:
+        return (args, frozenset(kwargs.items())) if keyed else None
+
+    def _get(key: Any) -> Any:
+        entry = _results.get(key)
+        if entry is None:
+            return _MISSING
+        if entry[1] is not None and monotonic() >= entry[1]:
+            del _results[key]
+            return _MISSING
+        _results.move_to_end(key)
+        return entry[0]
+
+    def _set(key: Any, result: Any):
+        _results[key] = (result, monotonic() + ttl if ttl is not None else None)
+        if maxsize is not None and len(_results) > maxsize:
+            _results.popitem(last=False)
+
+    def reset():
+        with _lock:
+            _results.clear()
+            _in_flight.clear()
 
     if not iscoroutinefunction(target):
 
         @wraps(target)
         def sync_wrapper(*args, **kwargs):
-            nonlocal _result, _has_run
-            if not _has_run:
-                _has_run = True
-                _result = target(*args, **kwargs)
-            return _result
-
+            key = _key(args, kwargs)
+            while True:
+                # lock only protect lookup, target is called outside
+                with _lock:
+                    result = _get(key)
+                    if result is not _MISSING:
+                        return result
+                    flight = _in_flight.get(key)
+                    if flight is None:
+                        flight = _in_flight[key] = (get_ident(), Event())
+                        break
+                    if flight[0] == get_ident():
+                        raise RuntimeError(f"run_once {get_function_name(target)} called recursively")
+                # wait first caller, then check again (it could have failed)
+                flight[1].wait()
+            try:
+                result = target(*args, **kwargs)
+                with _lock:
+                    # unless reset in between
+                    if _in_flight.get(key) is flight:
+                        _set(key, result)
+                return result
+            finally:
+                with _lock:
+                    if _in_flight.get(key) is flight:
+                        del _in_flight[key]
+                flight[1].set()
+
+        sync_wrapper.reset = reset  # type: ignore
         return sync_wrapper
 
+    @wraps(target)
     async def async_wrapper(*args, **kwargs):
-        nonlocal _result, _has_run
-        if not _has_run:
-            _has_run = True
-            _result = await target(*args, **kwargs)
-        return _result
-
+        key = _key(args, kwargs)
+        result = _get(key)
+        if result is not _MISSING:
+            return result
+        flight = _in_flight.get(key)
+        if flight is None:
+            flight = _in_flight[key] = await start_task(partial(target, *args, **kwargs))
+        try:
+            result = await join_task(flight)
+        except BaseException:
+            if _in_flight.get(key) is flight and task_done(flight):
+                del _in_flight[key]
+            raise
+        # first resumed caller keep result (unless reset in between)
+        if _in_flight.get(key) is flight:
+            del _in_flight[key]
+            _set(key, result)
+        return result
+
+    async_wrapper.reset = reset  # type: ignore
     return async_wrapper
 
 
+async def start_task(target: Callable[[], Awaitable[Any]]) -> Any:
+    """Start target in a new task, with asyncio or curio.
+
+    Args:
+        target (Callable[[], Awaitable[Any]]): async function without argument
+
+    Returns:
+        (Any): an asyncio future or a curio task, to pass to `join_task`.
+    """
+    try:
+        get_running_loop()
+    except RuntimeError:
+        from curio import spawn
+
+        task = await spawn(target, daemon=True)
+        # exception is raised to callers of join_task
+        task.report_crash = False
+        return task
+    return ensure_future(target())
+
+
+async def join_task(task: Any) -> Any:
+    """Wait result of a task started by `start_task`, without cancelling it if caller is cancelled.
+
+    Raises:
+        Exception: any exception raised by task target.
+    """
+    if isinstance(task, Future):
+        return await shield(task)
+    await task.wait()
+    if task.exception is not None:
+        raise task.exception
+    return task.result
+
+
+def task_done(task: Any) -> bool:
+    """Returns True if a task started by `start_task` is finished."""
+    return task.done() if isinstance(task, Future) else task.terminated
+
+
+async def wait_task(task: Any, timeout: Optional[float] = None) -> bool:
+    """Wait end of a task started by `start_task`, at most timeout seconds.
+
+    Returns:
+        (bool): True if task is finished.
+    """
+    if isinstance(task, Future):
+        done, _ = await wait({task}, timeout=timeout)
+        return bool(done)
+    from curio import ignore_after
+
+    async with ignore_after(timeout):
+        await task.wait()
+    return task.terminated
+
+
+async def cancel_task(task: Any) -> None:
+    """Cancel a task started by `start_task` and wait its end."""
+    if isinstance(task, Future):
+        task.cancel()
+        await wait({task})
+    else:
+        await task.cancel()
+
+
 @run_once
 def has_curio() -> bool:
     """Return True if curio extention is present.
@@ -146,6 +600,22 @@ def has_curio() -> bool:
         return False
 
 
+async def sleep(seconds: float) -> None:
+    """Non blocking sleep, with asyncio or curio.
+
+    Args:
+        seconds (float): sleep duration in seconds
+    """
+    try:
+        get_running_loop()
+    except RuntimeError:
+        from curio import sleep as curio_sleep
+
+        await curio_sleep(seconds)
+        return
+    await asyncio_sleep(seconds)
+
+
 def run(kernel, target, *args):
     """Curio run with independent contextvars.
 
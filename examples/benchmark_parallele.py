@@ -0,0 +1,44 @@
+"""Benchmark of parallele asyncio backends.
+
+Compare "asyncio" and "taskgroup" backends on children which finish
+without suspending (cache hits) and on children which suspend once.
+
+Run with `python examples/benchmark_parallele.py`.
+"""
+
+import asyncio
+import sys
+from timeit import default_timer
+
+import async_btree as bt
+
+WIDTH = 100
+ROUNDS = 200
+
+
+async def cache_hit():
+    return bt.SUCCESS
+
+
+async def suspend():
+    await asyncio.sleep(0)
+    return bt.SUCCESS
+
+
+async def measure(tree) -> float:
+    start = default_timer()
+    for _ in range(ROUNDS):
+        await tree()
+    return (default_timer() - start) / ROUNDS * 1e6
+
+
+async def main():
+    print(f"python {sys.version_info.major}.{sys.version_info.minor}, {WIDTH} children, {ROUNDS} rounds")
+    for child in [cache_hit, suspend]:
+        for backend in ["asyncio", "taskgroup"]:
+            tree = bt.parallele(children=[child] * WIDTH, backend=backend)
+            print(f"{child.__name__:>10} {backend:>10}: {await measure(tree):8.1f} us/tick")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -84,3 +84,33 @@ def test_analyze_sequence():
     )
     print_test = """ --> btree_1:\n     --(child)--> repeat_until:\n         --(condition)--> success_until_zero:\n         --(child)--> sequence:\n                      succes_threshold: 3\n             --(children)--> action:\n                             target: hello\n             --(children)--> action:\n                             target: hello\n             --(children)--> action:\n                             target: hello\n"""  # noqa: E501, B950
     assert stringify_analyze(a_tree) == print_test
+
+
+def test_analyze_shared_subtree():
+    shared = inverter(child=action(hello))
+    a_tree = analyze(sequence(children=[shared, shared, inverter(child=action(hello))]))
+    children = dict(a_tree.edges)["children"]
+    assert children[0] is children[1]
+    assert children[0] == children[2]
+    # cached layout, same result
+    assert analyze(shared) == children[0]
+
+
+def test_analyze_deep_tree():
+    tree = action(hello)
+    for _ in range(5000):
+        tree = inverter(child=tree)
+    node = analyze(tree)
+    printed_tree = stringify_analyze(node)
+    for _ in range(5000):
+        assert node.name == "inverter"
+        node = dict(node.edges)["child"][0]
+    assert node.name == "action"
+    assert printed_tree.count("--(child)--> inverter:") == 4999
+    assert printed_tree.endswith("target: hello\n")
+
+
+def test_analyze_after_alias():
+    tree = inverter(child=action(hello))
+    assert analyze(tree).name == "inverter"
+    assert analyze(alias(child=tree, name="renamed")).name == "renamed"
@@ -0,0 +1,143 @@
+from gc import collect
+from weakref import ref
+
+import pytest
+
+from async_btree import (
+    FAILURE,
+    RUNNING,
+    SUCCESS,
+    Blackboard,
+    BlackboardScheduler,
+    BTreeRunner,
+    compile,
+    inverter,
+    reactive,
+    sequence,
+)
+from async_btree.blackboard import get_reads, get_writes
+
+
+def test_blackboard_subscribe():
+    changes = []
+    blackboard = Blackboard(battery=100)
+    unsubscribe = blackboard.subscribe(["battery", "door"], changes.append)
+
+    blackboard["battery"] = 100
+    blackboard["battery"] = 90
+    blackboard.update(door="open", other=1)
+    assert changes == ["battery", "door"]
+    assert blackboard["battery"] == 90
+    assert blackboard.get("missing", 0) == 0
+    assert "door" in blackboard
+
+    unsubscribe()
+    blackboard["battery"] = 80
+    assert changes == ["battery", "door"]
+
+
+def test_get_reads():
+    blackboard = Blackboard()
+    tree = sequence(
+        children=[
+            inverter(blackboard.condition(lambda: True, reads=["battery"])),
+            blackboard.action(lambda: True, reads=["door"], writes=["position"]),
+        ]
+    )
+    assert get_reads(tree) == {"battery", "door"}
+    assert get_reads(compile(tree)) == {"battery", "door"}
+    assert get_reads(lambda: True) == set()
+    assert get_writes(tree) == {"position"}
+
+
+@pytest.mark.curio
+async def test_reactive():
+    blackboard = Blackboard(battery=100)
+    calls = []
+
+    def is_charged():
+        calls.append("is_charged")
+        return blackboard["battery"] > 20
+
+    tree = reactive(blackboard.condition(is_charged, reads=["battery"]), blackboard)
+    assert await tree() is SUCCESS
+    assert await tree() is SUCCESS
+    assert calls == ["is_charged"]
+
+    blackboard["battery"] = 10
+    assert await tree() is FAILURE
+    assert calls == ["is_charged", "is_charged"]
+
+
+@pytest.mark.curio
+async def test_reactive_garbage_collected():
+    blackboard = Blackboard(battery=100)
+    tree = reactive(blackboard.condition(lambda: blackboard["battery"] > 20, reads=["battery"]), blackboard)
+    assert await tree() is SUCCESS
+    reference = ref(tree)
+    del tree
+    collect()
+    assert reference() is None
+    assert blackboard._subscribers["battery"] == []
+
+
+@pytest.mark.curio
+async def test_reactive_running():
+    blackboard = Blackboard()
+    results = [RUNNING, SUCCESS]
+    tree = reactive(lambda: results.pop(0), blackboard)
+    assert await tree() is RUNNING
+    assert await tree() is SUCCESS
+    assert await tree() is SUCCESS
+
+
+def test_blackboard_scheduler():
+    blackboard = Blackboard(battery=100, position=0)
+    calls = []
+
+    def is_charged():
+        calls.append("is_charged")
+        return blackboard["battery"] > 20
+
+    def move():
+        blackboard["position"] += 1
+        return SUCCESS
+
+    tree = sequence(
+        children=[
+            blackboard.condition(is_charged, reads=["battery"]),
+            blackboard.action(move, writes=["position"]),
+        ]
+    )
+    with BTreeRunner() as runner:
+        scheduler = BlackboardScheduler(runner, tree, blackboard)
+        assert scheduler.pending
+        assert scheduler.tick()
+        assert not scheduler.tick()
+        assert calls == ["is_charged"]
+
+        # writes of tree are not read by tree
+        assert scheduler.settle() == 0
+
+        blackboard["battery"] = 10
+        assert scheduler.settle() == 1
+        assert not scheduler.result
+        assert blackboard["position"] == 1
+
+        scheduler.close()
+        blackboard["battery"] = 50
+        assert not scheduler.tick()
+
+
+def test_blackboard_scheduler_settle():
+    blackboard = Blackboard(counter=0)
+
+    def increment():
+        blackboard["counter"] += 1
+        return SUCCESS
+
+    tree = blackboard.action(increment, reads=["counter"], writes=["counter"])
+    with BTreeRunner() as runner:
+        scheduler = BlackboardScheduler(runner, tree, blackboard)
+        assert scheduler.settle(max_ticks=5) == 5
+        assert blackboard["counter"] == 5
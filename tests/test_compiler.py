@@ -0,0 +1,195 @@
+from time import monotonic
+
+import pytest
+
+from async_btree import (
+    FAILURE,
+    RUNNING,
+    SUCCESS,
+    ControlFlowException,
+    RetryPolicy,
+    action,
+    alias,
+    always_failure,
+    always_success,
+    compile,
+    condition,
+    decision,
+    decorate,
+    fallback,
+    ignore_exception,
+    inverter,
+    is_failure,
+    is_success,
+    parallele,
+    repeat_until,
+    retry,
+    retry_until_failed,
+    sequence,
+)
+from async_btree.deadline import current_deadline
+
+
+async def a_func():
+    return "a"
+
+
+def b_func():
+    return "b"
+
+
+async def failure_func():
+    return FAILURE
+
+
+def success_func():
+    return SUCCESS
+
+
+def exception_func():
+    raise RuntimeError("ops")
+
+
+def add(a, b=0):
+    return a + b
+
+
+async def b_decorator(child_value, other=""):
+    return f"b{child_value}{other}"
+
+
+def countdown(n: int):
+    counter = {"value": n}
+
+    def _countdown():
+        counter["value"] -= 1
+        return counter["value"] >= 0
+
+    return _countdown
+
+
+async def _check(tree):
+    assert await compile(tree)() == await tree()
+
+
+@pytest.mark.curio
+async def test_compile_control():
+    await _check(sequence(children=[a_func, b_func, success_func]))
+    await _check(sequence(children=[a_func, failure_func, success_func]))
+    await _check(sequence(children=[failure_func, a_func, success_func], succes_threshold=2))
+    await _check(sequence(children=[]))
+    await _check(fallback(children=[failure_func, b_func, a_func]))
+    await _check(fallback(children=[failure_func, failure_func]))
+    await _check(decision(condition=success_func, success_tree=a_func, failure_tree=b_func))
+    await _check(decision(condition=failure_func, success_tree=a_func, failure_tree=b_func))
+    await _check(decision(condition=failure_func, success_tree=a_func))
+    await _check(parallele(children=[a_func, b_func]))
+
+
+@pytest.mark.curio
+async def test_compile_decorator():
+    await _check(alias(child=a_func, name="a"))
+    await _check(decorate(a_func, b_decorator, other="c"))
+    await _check(decorate(b_func, lambda value: value * 2))
+    await _check(always_success(failure_func))
+    await _check(always_success(a_func))
+    await _check(always_failure(a_func))
+    assert isinstance(await compile(always_failure(ignore_exception(exception_func)))(), ControlFlowException)
+    for node in [is_success, is_failure, inverter]:
+        await _check(node(a_func))
+        await _check(node(failure_func))
+    await _check(action(add, a=1, b=2))
+    await _check(condition(add, a=0))
+
+
+@pytest.mark.curio
+async def test_compile_exception():
+    with pytest.raises(RuntimeError):
+        await compile(sequence(children=[a_func, exception_func]))()
+    with pytest.raises(ControlFlowException):
+        await compile(always_success(action(exception_func)))()
+    result = await compile(ignore_exception(action(exception_func)))()
+    assert isinstance(result, ControlFlowException)
+    assert isinstance(result.exception, RuntimeError)
+
+
+@pytest.mark.curio
+async def test_compile_loop():
+    assert await compile(repeat_until(condition=countdown(3), child=a_func))() == "a"
+    assert await compile(repeat_until(condition=failure_func, child=a_func))() == FAILURE
+    assert await compile(retry(inverter(countdown(2)), max_retry=3))()
+    assert not await compile(retry(inverter(countdown(5)), max_retry=3))()
+    assert await compile(retry_until_failed(countdown(10)))()
+    attempts: list = []
+    tree = retry(
+        inverter(countdown(2)), max_retry=3, policy=RetryPolicy(delay=0.001), on_attempt=lambda a, r: attempts.append(a)
+    )
+    assert await compile(tree)()
+    assert attempts == [1, 2, 3]
+
+
+@pytest.mark.curio
+async def test_compile_deep_tree():
+    tree = a_func
+    for i in range(200):
+        tree = sequence(children=[success_func, tree]) if i % 2 else always_success(ignore_exception(tree))
+    await _check(tree)
+
+
+@pytest.mark.curio
+async def test_compile_deep_chain():
+    tree = a_func
+    for _ in range(800):
+        tree = inverter(tree)
+    # interpreted tree is too deep under coverage
+    assert await compile(tree)() is True
+    assert await compile(inverter(tree))() is False
+
+
+@pytest.mark.curio
+async def test_compile_results():
+    await _check(sequence(children=[a_func, b_func], results="last"))
+    await _check(sequence(children=[a_func, b_func], results="none"))
+    await _check(fallback(children=[failure_func, b_func], results="last"))
+
+    tree = sequence(children=[a_func, sequence(children=[b_func, success_func], results="last")])
+    assert await compile(tree, results="none")() is SUCCESS
+    assert await compile(tree, results="last")() == SUCCESS
+    assert await compile(tree)() == ["a", SUCCESS]
+
+    with pytest.raises(AssertionError):
+        compile(tree, results="first")
+
+
+@pytest.mark.curio
+async def test_compile_running():
+    def running_func():
+        return RUNNING
+
+    await _check(sequence(children=[a_func, running_func, b_func]))
+    await _check(fallback(children=[failure_func, running_func, b_func]))
+    await _check(decision(condition=running_func, success_tree=a_func, failure_tree=b_func))
+    await _check(repeat_until(condition=running_func, child=a_func))
+    await _check(repeat_until(condition=success_func, child=running_func))
+    await _check(retry(running_func))
+    for node in [always_success, always_failure, is_success, is_failure, inverter]:
+        await _check(node(running_func))
+        assert await compile(node(running_func))() is RUNNING
+
+
+def test_compile_metadata():
+    tree = sequence(children=[a_func])
+    compiled = compile(tree)
+    assert compiled.__wrapped__ is tree
+    assert compiled.__node_metadata.name == "sequence"
+
+
+@pytest.mark.curio
+async def test_compile_deadline():
+    token = current_deadline.set(monotonic() - 1)
+    try:
+        result = await compile(sequence([success_func, a_func]))()
+        assert isinstance(result, ControlFlowException)
+        assert isinstance(result.exception, TimeoutError)
+    finally:
+        current_deadline.reset(token)
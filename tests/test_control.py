@@ -1,18 +1,24 @@
 from contextvars import ContextVar
+from inspect import getclosurevars
+from time import monotonic
 
 import pytest
 
 from async_btree import (
     FAILURE,
+    RUNNING,
     SUCCESS,
     ControlFlowException,
     decision,
     fallback,
+    fallback_with_memory,
     ignore_exception,
     repeat_until,
     selector,
     sequence,
+    sequence_with_memory,
 )
+from async_btree.deadline import current_deadline
 
 
 async def a_func():
@@ -132,3 +138,132 @@ async def test_repeat_until_return_last_result():
     result = await repeat_until(condition=tick, child=ignore_exception(exception_func))()
     assert counter.get() == -1
     assert isinstance(result, ControlFlowException)
+
+
+@pytest.mark.curio
+async def test_sync_children():
+    calls = []
+
+    def sync_success():
+        calls.append("success")
+        return SUCCESS
+
+    def sync_failure():
+        calls.append("failure")
+        return FAILURE
+
+    assert await sequence(children=[sync_success, a_func, sync_success])() == [SUCCESS, "a", SUCCESS]
+    assert await fallback(children=[sync_failure, sync_success])() == [FAILURE, SUCCESS]
+    assert await decision(condition=sync_failure, success_tree=a_func, failure_tree=sync_success)()
+    assert not await repeat_until(condition=sync_failure, child=a_func)()
+    assert calls == ["success", "success", "failure", "success", "failure", "success", "failure"]
+
+    # sync children are not wrapped in a coroutine
+    tree = decision(condition=sync_failure, success_tree=a_func)
+    assert getclosurevars(tree).nonlocals["_condition"] is sync_failure
+
+
+@pytest.mark.curio
+async def test_sequence_results():
+    assert await sequence(children=[a_func, b_func], results="all")() == ["a", "b"]
+    assert await sequence(children=[a_func, b_func], results="last")() == "b"
+    assert await sequence(children=[a_func, b_func], results="none")() is SUCCESS
+    assert await sequence(children=[a_func, failure_func], results="none")() is FAILURE
+    assert await fallback(children=[failure_func, b_func], results="last")() == "b"
+    assert await selector(children=[failure_func, b_func], results="none")() is SUCCESS
+
+    with pytest.raises(AssertionError):
+        sequence(children=[a_func], results="first")
+
+
+def running(ticks: int, result=SUCCESS):
+    """Returns a leaf which is running during specified ticks and log its evaluation."""
+    state = {"ticks": ticks, "calls": 0}
+
+    def _running():
+        state["calls"] += 1
+        if state["ticks"] > 0:
+            state["ticks"] -= 1
+            return RUNNING
+        return result
+
+    _running.state = state  # type: ignore
+    return _running
+
+
+@pytest.mark.curio
+async def test_running():
+    assert not RUNNING
+    assert repr(RUNNING) == "RUNNING"
+
+    assert await sequence(children=[a_func, running(1), a_func])() is RUNNING
+    assert await fallback(children=[failure_func, running(1), a_func])() is RUNNING
+    assert await decision(condition=running(1), success_tree=a_func, failure_tree=b_func)() is RUNNING
+    assert await repeat_until(condition=running(1), child=a_func)() is RUNNING
+    assert await repeat_until(condition=success_func, child=running(1))() is RUNNING
+
+
+@pytest.mark.curio
+async def test_sequence_with_memory():
+    first = running(0)
+    tree = sequence_with_memory(children=[first, running(2, result="b"), a_func])
+    assert await tree() is RUNNING
+    assert await tree() is RUNNING
+    assert await tree() == [SUCCESS, "b", "a"]
+    assert first.state["calls"] == 1
+
+    # state is reset once finished
+    assert await tree() == [SUCCESS, "b", "a"]
+    assert first.state["calls"] == 2
+
+    tree = sequence_with_memory(children=[running(1), failure_func, a_func], results="last")
+    assert await tree() is RUNNING
+    assert await tree() is FAILURE
+    assert await sequence_with_memory(children=[a_func, b_func], results="last")() == "b"
+    assert await sequence_with_memory(children=[a_func, b_func], results="none")() is SUCCESS
+
+    with pytest.raises(AssertionError):
+        sequence_with_memory(children=[a_func], succes_threshold=2)
+
+
+@pytest.mark.curio
+async def test_sequence_with_memory_exception():
+    first = running(0)
+    tree = sequence_with_memory(children=[first, running(1), exception_func])
+    assert await tree() is RUNNING
+    with pytest.raises(RuntimeError):
+        await tree()
+    assert first.state["calls"] == 1
+    # state is reset on exception
+    with pytest.raises(RuntimeError):
+        await tree()
+    assert first.state["calls"] == 2
+
+
+@pytest.mark.curio
+async def test_fallback_with_memory():
+    first = running(0, result=FAILURE)
+    tree = fallback_with_memory(children=[first, running(1, result=FAILURE), b_func])
+    assert await tree() is RUNNING
+    assert await tree() == [FAILURE, FAILURE, "b"]
+    assert first.state["calls"] == 1
+    assert await fallback_with_memory(children=[failure_func, failure_func])() is FAILURE
+
+
+@pytest.mark.curio
+async def test_sequence_deadline():
+    calls: list = []
+
+    def child():
+        calls.append(True)
+        return SUCCESS
+
+    token = current_deadline.set(monotonic() - 1)
+    try:
+        result = await sequence([child, child])()
+    finally:
+        current_deadline.reset(token)
+    assert isinstance(result, ControlFlowException)
+    assert isinstance(result.exception, TimeoutError)
+    assert not calls
+    assert await sequence([child, child])()
@@ -1,23 +1,42 @@
+from asyncio import sleep as asyncio_sleep
 from contextvars import ContextVar
+from time import monotonic
 
 import pytest
+from curio import sleep, spawn
 
 from async_btree import (
     FAILURE,
+    RUNNING,
     SUCCESS,
+    BTreeRunner,
     ControlFlowException,
+    RateLimiter,
+    RetryPolicy,
     alias,
     always_failure,
     always_success,
+    analyze,
+    cached,
+    circuit_breaker,
     decorate,
+    fallback,
     ignore_exception,
     inverter,
     is_failure,
     is_success,
+    parallele,
+    parallele_results,
+    rate_limit,
     retry,
     retry_until_failed,
     retry_until_success,
+    sequence,
+    single_flight,
+    throttle,
+    timeout,
 )
+from async_btree.deadline import current_deadline
 
 
 async def a_func():
@@ -170,6 +189,45 @@ async def test_retry():
     assert "max_retry" in meta.properties
 
 
+def failing(results: list):
+    def _failing():
+        results.append(FAILURE)
+        return len(results) == 4
+
+    return _failing
+
+
+@pytest.mark.curio
+async def test_retry_policy():
+    attempts: list = []
+    policy = RetryPolicy(delay=0.01, factor=2, max_delay=0.02)
+    assert await retry(failing([]), max_retry=5, policy=policy, on_attempt=lambda a, r: attempts.append((a, r)))()
+    assert attempts == [(1, False), (2, False), (3, False), (4, True)]
+    assert [policy.backoff(attempt) for attempt in range(1, 4)] == [0.01, 0.02, 0.02]
+    assert 0.005 <= RetryPolicy(delay=0.01, jitter=0.5).backoff(1) <= 0.015
+
+    # stop before max_elapsed
+    results: list = []
+    assert not await retry(failing(results), max_retry=-1, policy=RetryPolicy(delay=0.05, max_elapsed=0.08))()
+    assert len(results) == 2
+
+    # retry only some results
+    results = []
+    assert not await retry(failing(results), policy=RetryPolicy(retry_on=lambda r: r is not FAILURE))()
+    assert len(results) == 1
+
+    results = []
+    assert await retry_until_success(failing(results), policy=RetryPolicy(delay=0.001))()
+    assert len(results) == 4
+
+
+@pytest.mark.asyncio
+async def test_retry_policy_asyncio():
+    results: list = []
+    assert await retry(failing(results), max_retry=4, policy=RetryPolicy(delay=0.001))()
+    assert len(results) == 4
+
+
 @pytest.mark.curio
 async def test_retry_until_success():
     counter = ContextVar("counter_test_retry_until_success", default=5)
@@ -210,3 +268,354 @@ async def test_retry_until_failed():
     meta = retry_until_failed(ignore_exception(tick)).__node_metadata
     assert meta.name == "retry_until_failed"
     assert "max_retry" in meta.properties
+
+
+@pytest.mark.curio
+async def test_running_child():
+    async def running_func():
+        return RUNNING
+
+    for node in [
+        alias(running_func, name="running"),
+        always_success(running_func),
+        always_failure(running_func),
+        is_success(running_func),
+        is_failure(running_func),
+        inverter(running_func),
+        retry(running_func),
+        ignore_exception(running_func),
+    ]:
+        assert await node() is RUNNING
+
+
+@pytest.mark.curio
+async def test_timeout():
+    async def slow():
+        await sleep(10)
+        return SUCCESS
+
+    start = monotonic()
+    result = await timeout(slow, seconds=0.05)()
+    assert monotonic() - start < 5
+    assert isinstance(result, ControlFlowException)
+    assert isinstance(result.exception, TimeoutError)
+    assert await timeout(a_func, seconds=1)() == "a"
+    assert current_deadline.get() is None
+
+    # nested sequence skip remaining children after deadline
+    calls: list = []
+
+    async def wait():
+        calls.append(True)
+        await sleep(0.03)
+        return SUCCESS
+
+    assert not await timeout(sequence([wait, wait, wait]), seconds=0.05)()
+    assert len(calls) == 2
+
+    with pytest.raises(AssertionError):
+        timeout(a_func, seconds=-1)
+    meta = timeout(a_func, seconds=1).__node_metadata
+    assert meta.name == "timeout"
+    assert "seconds" in meta.properties
+
+
+@pytest.mark.asyncio
+async def test_timeout_asyncio():
+    async def slow():
+        await asyncio_sleep(10)
+        return SUCCESS
+
+    assert not await timeout(slow, seconds=0.05)()
+    # enclosing deadline is nearest
+    assert not await timeout(timeout(slow, seconds=10), seconds=0.05)()
+
+    results: list = []
+
+    def failing():
+        results.append(FAILURE)
+        return FAILURE
+
+    policy = RetryPolicy(delay=0.03)
+    assert not await timeout(retry(failing, max_retry=-1, policy=policy), seconds=0.1)()
+    assert 1 < len(results) < 4
+
+
+@pytest.mark.curio
+async def test_rate_limit():
+    limiter = RateLimiter(rate=20, capacity=2)
+    tree = rate_limit(a_func, limiter=limiter)
+    start = monotonic()
+    for _ in range(4):
+        assert await tree() == "a"
+    # 2 tokens in bucket, then one every 50ms
+    assert 0.08 <= monotonic() - start < 1
+
+    # a limiter is shared between trees
+    fail_fast = rate_limit(a_func, limiter=limiter, wait=False)
+    assert await fail_fast() is FAILURE
+    await sleep(0.06)
+    assert await fail_fast() == "a"
+
+    with pytest.raises(AssertionError):
+        RateLimiter(rate=0)
+    with pytest.raises(AssertionError):
+        RateLimiter(rate=1, capacity=0.5)
+    meta = tree.__node_metadata
+    assert meta.name == "rate_limit"
+    assert "limiter" in meta.properties
+
+
+@pytest.mark.asyncio
+async def test_throttle():
+    tree = throttle(a_func, min_interval=0.05)
+    start = monotonic()
+    assert await tree() == "a"
+    assert await tree() == "a"
+    assert monotonic() - start >= 0.04
+
+    fail_fast = throttle(a_func, min_interval=10, wait=False)
+    assert await fail_fast() == "a"
+    assert not await fail_fast()
+    # no token before deadline
+    slow = throttle(a_func, min_interval=10)
+    assert await slow() == "a"
+    start = monotonic()
+    assert isinstance(await timeout(slow, seconds=1)(), ControlFlowException)
+    assert monotonic() - start < 0.5
+    assert throttle(a_func, min_interval=1).__node_metadata.name == "throttle"
+    with pytest.raises(AssertionError):
+        throttle(a_func, min_interval=0)
+    with pytest.raises(AssertionError):
+        throttle(a_func)
+    with pytest.raises(AssertionError):
+        throttle(a_func, min_interval=1, limiter=RateLimiter(rate=1, capacity=1))
+
+
+@pytest.mark.asyncio
+async def test_throttle_shared():
+    limiter = RateLimiter(rate=1 / 10, capacity=1)
+    first = throttle(a_func, wait=False, limiter=limiter)
+    second = throttle(a_func, wait=False, limiter=limiter)
+    assert await first() == "a"
+    # interval is shared between trees
+    assert not await second()
+    assert not await first()
+
+
+@pytest.mark.curio
+async def test_circuit_breaker():
+    calls: list = []
+
+    def child():
+        calls.append(True)
+        return len(calls) >= 3
+
+    tree = circuit_breaker(child, failure_threshold=2, reset_timeout=0.05)
+    assert not await tree()
+    assert dict(analyze(tree).properties)["state"] == "closed"
+    assert not await tree()
+    assert dict(analyze(tree).properties)["state"] == "open"
+    # child is not evaluated while open
+    assert not await tree()
+    assert len(calls) == 2
+
+    await sleep(0.06)
+    # probe succeed
+    assert await tree()
+    assert len(calls) == 3
+    assert dict(analyze(tree).properties)["state"] == "closed"
+    assert dict(analyze(tree).properties)["failures"] == 0
+
+
+@pytest.mark.curio
+async def test_circuit_breaker_half_open():
+    probes: list = []
+
+    async def probe():
+        probes.append(True)
+        await sleep(0.02)
+        raise RuntimeError("down")
+
+    tree = circuit_breaker(probe, failure_threshold=1, reset_timeout=0.01)
+    with pytest.raises(RuntimeError):
+        await tree()
+    await sleep(0.02)
+    results = await parallele_results([tree, tree], backend="curio")()
+    # a single probe, which fail and open breaker again
+    assert len(probes) == 2
+    assert isinstance(results[0], ControlFlowException)
+    assert results[1] is FAILURE
+    assert dict(analyze(tree).properties)["state"] == "open"
+
+    with pytest.raises(AssertionError):
+        circuit_breaker(probe, failure_threshold=0)
+    with pytest.raises(AssertionError):
+        circuit_breaker(probe, reset_timeout=-1)
+
+
+@pytest.mark.curio
+async def test_circuit_breaker_stale_call():
+    # (delay, result) of each call
+    behaviours = [(0.03, SUCCESS), (0, FAILURE), (0.03, FAILURE)]
+
+    async def child():
+        delay, result = behaviours.pop(0)
+        await sleep(delay)
+        return result
+
+    tree = circuit_breaker(child, failure_threshold=1, reset_timeout=0.01)
+    stale = await spawn(tree)
+    await sleep(0)
+    assert not await tree()
+    assert dict(analyze(tree).properties)["state"] == "open"
+    await sleep(0.015)
+    probe = await spawn(tree)
+    # stale success finish while probe is in flight
+    assert await stale.join()
+    assert dict(analyze(tree).properties)["state"] == "half_open"
+    assert not await tree()
+    assert not await probe.join()
+    assert dict(analyze(tree).properties)["state"] == "open"
+
+
+@pytest.mark.curio
+async def test_circuit_breaker_cancelled():
+    async def fast():
+        return SUCCESS
+
+    async def slow():
+        await sleep(1)
+        return SUCCESS
+
+    breaker = circuit_breaker(slow, failure_threshold=2)
+    # breaker is cancelled as a loser of parallele
+    tree = parallele([fast, breaker], succes_threshold=1)
+    for _ in range(3):
+        assert await tree()
+    assert dict(analyze(breaker).properties)["state"] == "closed"
+    assert dict(analyze(breaker).properties)["failures"] == 0
+
+
+@pytest.mark.curio
+async def test_cached():
+    calls: list = []
+    values = {"key": 1}
+
+    def child():
+        calls.append(values["key"])
+        return values["key"] * 10
+
+    tree = cached(child, key=lambda: values["key"], maxsize=2)
+    assert await tree() == 10
+    assert await tree() == 10
+    values["key"] = 2
+    assert await tree() == 20
+    values["key"] = 3
+    assert await tree() == 30
+    # 1 is evicted
+    values["key"] = 1
+    assert await tree() == 10
+    assert calls == [1, 2, 3, 1]
+    properties = dict(analyze(tree).properties)
+    assert (properties["hits"], properties["misses"], properties["maxsize"]) == (1, 4, 2)
+
+    ttl_tree = cached(child, ttl=0.02)
+    await ttl_tree()
+    await ttl_tree()
+    await sleep(0.03)
+    await ttl_tree()
+    assert dict(analyze(ttl_tree).properties)["misses"] == 2
+
+    # RUNNING is not cached
+    running_tree = cached(lambda: RUNNING)
+    await running_tree()
+    await running_tree()
+    assert dict(analyze(running_tree).properties)["hits"] == 0
+
+    with pytest.raises(AssertionError):
+        cached(child, maxsize=0)
+    with pytest.raises(AssertionError):
+        cached(child, ttl=0)
+
+
+def test_cached_per_tick():
+    calls: list = []
+
+    def expensive_condition():
+        calls.append(True)
+        return FAILURE
+
+    condition = cached(expensive_condition, per_tick=True)
+    tree = fallback([sequence([condition, a_func]), sequence([inverter(condition), a_func])])
+    with BTreeRunner() as runner:
+        assert runner.run(tree)
+        assert runner.run(tree)
+    assert len(calls) == 2
+
+
+@pytest.mark.curio
+async def test_cached_per_tick_outside_runner():
+    calls: list = []
+
+    def expensive_condition():
+        calls.append(True)
+        return FAILURE
+
+    condition = cached(expensive_condition, per_tick=True)
+    assert not await condition()
+    assert not await condition()
+    # no tick, no cache
+    assert len(calls) == 2
+    assert dict(analyze(condition).properties)["hits"] == 0
+
+
+def counted(sleep_function, calls: list, error: bool = False):
+    async def _counted():
+        calls.append(True)
+        await sleep_function(0.02)
+        if error:
+            raise RuntimeError("down")
+        return len(calls)
+
+    return _counted
+
+
+@pytest.mark.curio
+async def test_single_flight():
+    calls: list = []
+    tree = single_flight(counted(sleep, calls))
+    assert await parallele_results([tree, tree, tree])() == [1, 1, 1]
+    # next evaluation start a new flight
+    assert await tree() == 2
+
+    failing = single_flight(counted(sleep, [], error=True))
+    results = await parallele_results([failing, failing])()
+    assert all(isinstance(result, ControlFlowException) for result in results)
+    assert isinstance(results[0].exception, RuntimeError)
+
+    # one flight per key
+    keyed_calls: list = []
+    keys = iter([1, 2])
+    keyed = single_flight(counted(sleep, keyed_calls), key=lambda: next(keys))
+    await parallele_results([keyed, keyed])()
+    assert len(keyed_calls) == 2
+
+    assert await single_flight(lambda: "c")() == "c"
+    assert single_flight(counted(sleep, [])).__node_metadata.name == "single_flight"
+
+
+@pytest.mark.asyncio
+async def test_single_flight_asyncio():
+    calls: list = []
+    tree = single_flight(counted(asyncio_sleep, calls))
+    # a cancelled caller does not cancel others
+    results = await parallele_results([timeout(tree, seconds=0.001), tree], backend="asyncio")()
+    assert isinstance(results[0], ControlFlowException)
+    assert results[1] == 1
+    assert len(calls) == 1
+
+    # flight is forgotten when it ends, even without caller
+    assert isinstance(await timeout(tree, seconds=0.001)(), ControlFlowException)
+    await asyncio_sleep(0.05)
+    assert await tree() == 3
@@ -0,0 +1,73 @@
+from queue import Full
+from threading import Event, get_ident
+
+import pytest
+from curio import ignore_after
+
+from async_btree import BTreeRunner, ControlFlowException, ThreadPool, sequence, threaded_action
+from async_btree.executor import run_in_executor
+from async_btree.utils import to_async
+
+
+def test_thread_pool_metrics():
+    release = Event()
+    with ThreadPool(max_workers=1, max_queue=1) as pool:
+        running = pool.submit(release.wait)
+        queued = pool.submit(lambda: "queued")
+        with pytest.raises(Full):
+            pool.submit(lambda: "rejected")
+        metrics = pool.metrics()
+        assert metrics.queue_depth + metrics.in_flight == 2
+        assert metrics.rejected == 1
+
+        release.set()
+        assert running.result() and queued.result() == "queued"
+
+    metrics = pool.metrics()
+    assert (metrics.queue_depth, metrics.in_flight) == (0, 0)
+    assert (metrics.submitted, metrics.completed, metrics.rejected) == (2, 2, 1)
+    assert metrics.max_wait_time > 0
+    assert metrics.total_wait_time >= metrics.max_wait_time
+
+
+def test_thread_pool_cancel():
+    release = Event()
+    with ThreadPool(max_workers=1) as pool:
+        pool.submit(release.wait)
+        assert pool.submit(lambda: "cancelled").cancel()
+        release.set()
+    assert pool.metrics().queue_depth == 0
+
+
+@pytest.mark.curio
+async def test_threaded_action():
+    with ThreadPool(max_workers=1) as pool:
+        assert await threaded_action(get_ident, executor=pool)() != get_ident()
+        assert await threaded_action(pow, executor=pool, base=2, exp=3)() == 8
+        with pytest.raises(ControlFlowException):
+            await threaded_action(pow, executor=pool, base=0, exp=-1)()
+    assert threaded_action(get_ident).__node_metadata.name == "threaded_action"
+
+
+@pytest.mark.curio
+async def test_curio_run_in_executor_cancel():
+    release = Event()
+    with ThreadPool(max_workers=1) as pool:
+        pool.submit(release.wait)
+        # queued call is cancelled with its caller
+        assert await ignore_after(0.01, run_in_executor(pool, lambda: "cancelled")) is None
+        assert pool.metrics().queue_depth == 0
+        release.set()
+
+
+@pytest.mark.asyncio
+async def test_to_async_executor():
+    with ThreadPool() as pool:
+        assert await to_async(get_ident, executor=pool)() != get_ident()
+        assert await sequence(children=[to_async(lambda: "a", executor=pool)])() == ["a"]
+
+
+def test_runner_thread_pool():
+    with ThreadPool(max_workers=1) as pool, BTreeRunner(thread_pool=pool) as r:
+        r.run(threaded_action(get_ident))
+        assert pool.metrics().completed == 1
@@ -1,6 +1,8 @@
+from concurrent.futures import ProcessPoolExecutor
+
 import pytest
 
-from async_btree import action, condition
+from async_btree import ControlFlowException, action, condition, process_action
 
 
 @pytest.mark.curio
@@ -30,3 +32,17 @@ async def test_action_results():
 
     assert await action(compute, a=1, b=1)() == 2
     assert action(compute, a=1, b=1).__node_metadata.name == "action"
+
+
+@pytest.mark.curio
+async def test_process_action():
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        assert await process_action(pow, pool=pool, base=2, exp=10)() == 1024
+        with pytest.raises(ControlFlowException):
+            await process_action(pow, pool=pool, base=0, exp=-1)()
+    assert process_action(pow).__node_metadata.name == "process_action"
+
+
+@pytest.mark.asyncio
+async def test_process_action_asyncio():
+    assert await process_action(pow, base=2, exp=3)() == 8
@@ -1,6 +1,11 @@
+from asyncio import CancelledError, ensure_future
+from asyncio import sleep as asyncio_sleep
+from time import monotonic
+
 import pytest
 
-from async_btree import afilter, amap
+from async_btree import afilter, afilter_batched, amap, amap_batched
+from async_btree.utils import sleep
 
 
 async def inc(a):
@@ -37,3 +42,122 @@ async def test_afilter_amap_aiter():
 
     assert await process1() == [2, 4]
     assert await process2() == [1, 3, 5]
+
+
+def delayed(in_flight: list, peaks: list):
+    async def _delayed(delay):
+        in_flight.append(delay)
+        peaks.append(len(in_flight))
+        await sleep(delay)
+        in_flight.remove(delay)
+        if delay < 0:
+            raise ValueError(delay)
+        return delay
+
+    return _delayed
+
+
+@pytest.mark.curio
+async def test_amap_concurrency():
+    peaks: list = []
+    func = delayed([], peaks)
+    delays = [0.03, 0.01, 0.02, 0.01]
+    start = monotonic()
+    assert [i async for i in amap(func, delays, concurrency=2)] == delays
+    assert max(peaks) == 2
+    assert monotonic() - start < sum(delays)
+    assert [i async for i in amap(func, delays, concurrency=4, ordered=False)] == sorted(delays)
+    assert [i async for i in amap(inc, afilter(even, [0, 1, 2, 3, 4]), concurrency=2)] == [1, 3, 5]
+    with pytest.raises(AssertionError):
+        [i async for i in amap(func, delays, concurrency=0)]
+
+
+@pytest.mark.asyncio
+async def test_amap_concurrency_asyncio():
+    read: list = []
+
+    async def source():
+        for delay in [0.02, 0.01, 0.03, 0.01]:
+            read.append(delay)
+            yield delay
+
+    peaks: list = []
+    results = []
+    async for result in amap(delayed([], peaks), source(), concurrency=2, ordered=False):
+        results.append(result)
+        # backpressure, source is read at most 2 items ahead
+        assert len(read) - len(results) <= 2
+    assert results == [0.01, 0.02, 0.01, 0.03]
+    assert max(peaks) == 2
+
+    with pytest.raises(ValueError):
+        [i async for i in amap(delayed([], []), [0.01, -0.001, 0.02], concurrency=3)]
+
+
+@pytest.mark.curio
+async def test_amap_batched():
+    batches: list = []
+
+    def inc_all(batch):
+        batches.append(len(batch))
+        return [i + 1 for i in batch]
+
+    assert [i async for i in amap_batched(inc_all, range(5), batch_size=2)] == [1, 2, 3, 4, 5]
+    assert batches == [2, 2, 1]
+
+    async def even_all(batch):
+        return [i % 2 == 0 for i in batch]
+
+    assert [i async for i in afilter_batched(even_all, amap(inc, range(5)), batch_size=3)] == [2, 4]
+    with pytest.raises(AssertionError):
+        [i async for i in amap_batched(inc_all, range(5), batch_size=0)]
+
+
+async def trickle(sleep_function, items: list):
+    for item in items:
+        await sleep_function(item)
+        yield item
+
+
+@pytest.mark.curio
+async def test_amap_batched_flush_timeout():
+    batches: list = []
+
+    def collect(batch):
+        batches.append(list(batch))
+        return batch
+
+    items = [0, 0, 0.05, 0, 0.05]
+    assert [i async for i in amap_batched(collect, trickle(sleep, items), batch_size=10, flush_timeout=0.02)] == items
+    assert batches == [[0, 0], [0.05, 0], [0.05]]
+
+
+@pytest.mark.asyncio
+async def test_afilter_batched_flush_timeout():
+    items = [0, 0.05, 0, 0]
+    result = [i async for i in afilter_batched(lambda b: [True] * len(b), trickle(sleep, items), 3, flush_timeout=0.02)]
+    assert result == items
+
+
+@pytest.mark.asyncio
+async def test_amap_batched_flush_timeout_cancel():
+    read: list = []
+
+    async def source():
+        for item in range(3):
+            await asyncio_sleep(0.05)
+            read.append(item)
+            yield item
+
+    async def consume():
+        return [i async for i in amap_batched(lambda b: b, source(), batch_size=10, flush_timeout=0.01)]
+
+    consumer = ensure_future(consume())
+    # consumer is waiting first item
+    await asyncio_sleep(0.02)
+    consumer.cancel()
+    with pytest.raises(CancelledError):
+        await consumer
+    await asyncio_sleep(0.1)
+    # reading task is cancelled with consumer
+    assert read == []
@@ -0,0 +1,131 @@
+import pytest
+
+from async_btree import (
+    FAILURE,
+    action,
+    alias,
+    always_success,
+    analyze,
+    compile,
+    condition,
+    decision,
+    fallback,
+    ignore_exception,
+    inverter,
+    is_failure,
+    is_success,
+    optimize,
+    retry_until_failed,
+    sequence,
+)
+from async_btree.definition import alias_node_metadata
+from async_btree.utils import to_async
+
+
+async def a_func():
+    return "a"
+
+
+def b_func():
+    return "b"
+
+
+def failure_func():
+    return FAILURE
+
+
+def exception_func():
+    raise RuntimeError("ops")
+
+
+@pytest.mark.curio
+async def test_optimize_alias():
+    tree = alias(child=alias(child=a_func, name="inner"), name="outer")
+    target, removed_frames = optimize(tree)
+    assert removed_frames == 2
+    assert await target() == "a"
+    assert analyze(target).name == "outer"
+
+
+@pytest.mark.curio
+async def test_optimize_boolean_stack():
+    for node, expected in [
+        (is_success(is_success(b_func)), True),
+        (inverter(inverter(b_func)), True),
+        (inverter(is_success(b_func)), False),
+        (is_failure(inverter(b_func)), True),
+        (is_success(inverter(failure_func)), True),
+        (inverter(inverter(inverter(b_func))), False),
+    ]:
+        target, removed_frames = optimize(node)
+        assert removed_frames >= 1
+        assert await target() is expected
+        assert await node() is expected
+
+    # fused node is named after its own factory, unless aliased
+    for node, name in [
+        (is_failure(inverter(b_func)), "is_success"),
+        (inverter(inverter(b_func)), "is_success"),
+        (inverter(is_success(b_func)), "inverter"),
+        (is_success(is_success(b_func)), "is_success"),
+    ]:
+        assert analyze(optimize(node).target).name == name
+
+    # fused node keep alias name
+    target, _ = optimize(alias_node_metadata(is_success(inverter(failure_func)), name="no_failure"))
+    assert analyze(target).name == "no_failure"
+    assert await target() is True
+
+
+@pytest.mark.curio
+async def test_optimize_to_async():
+    target, removed_frames = optimize(inverter(to_async(b_func)))
+    assert removed_frames == 1
+    assert await target() is False
+    assert dict(analyze(target).edges)["child"] == [analyze(b_func)]
+
+    # root stay awaitable
+    assert optimize(to_async(b_func)).removed_frames == 0
+    assert await optimize(to_async(b_func)).target() == "b"
+
+
+@pytest.mark.curio
+async def test_optimize_tree():
+    tree = alias(
+        child=sequence(
+            children=[
+                fallback(children=[inverter(condition(b_func)), alias(child=action(b_func), name="b")]),
+                decision(condition=inverter(condition(failure_func)), success_tree=action(a_func)),
+                retry_until_failed(inverter(inverter(condition(failure_func)))),
+            ]
+        ),
+        name="root",
+    )
+    target, removed_frames = optimize(tree)
+    assert removed_frames == 7
+    assert await target() == await tree()
+    assert await compile(target)() == await tree()
+    assert analyze(target).name == "root"
+    assert dict(analyze(target).edges)["children"][0].name == "fallback"
+
+
+def test_optimize_keep_unknown_node():
+    assert optimize(a_func) == (a_func, 0)
+
+
+@pytest.mark.curio
+async def test_optimize_deep_tree():
+    tree = a_func
+    for _ in range(800):
+        tree = inverter(tree)
+    target, removed_frames = optimize(tree)
+    assert removed_frames == 799
+    assert await target() is True
+
+    tree = a_func
+    for _ in range(800):
+        tree = always_success(ignore_exception(tree))
+    target, removed_frames = optimize(tree)
+    assert removed_frames == 0
+    # interpreted tree is too deep under coverage
+    assert await compile(target)() == "a"
@@ -1,9 +1,22 @@
+import sys
+from asyncio import CancelledError, Task, get_running_loop
 from asyncio import sleep as asyncio_sleep
+from time import monotonic
 
 import pytest
-from curio import sleep
+from curio import TaskCancelled, sleep
 
-from async_btree import FAILURE, parallele
+from async_btree import (
+    FAILURE,
+    RUNNING,
+    BTreeRunner,
+    ConcurrencyLimiter,
+    ControlFlowException,
+    foreach,
+    parallele,
+    parallele_as_completed,
+    parallele_results,
+)
 from async_btree.parallele import parallele_asyncio
 
 
@@ -41,6 +54,10 @@ def c_func():
     return "c"
 
 
+async def exception_func():
+    raise RuntimeError("ops")
+
+
 @pytest.mark.curio
 async def test_parallele():
     assert await parallele(children=[a_func])()
@@ -85,3 +102,262 @@ async def test_parallele_asyncio():
     ).__node_metadata
     assert meta.name == "parallele"
     assert "succes_threshold" in meta.properties
+
+
+@pytest.mark.curio
+async def test_parallele_running():
+    async def running_func():
+        return RUNNING
+
+    assert await parallele(children=[c_func, running_func])() is RUNNING
+    assert await parallele(children=[c_func, running_func], succes_threshold=1)() is True
+
+
+def slow(sleep_function, cancelled: list):
+    async def _slow():
+        try:
+            await sleep_function(10)
+        except (CancelledError, TaskCancelled):
+            cancelled.append(True)
+            raise
+        return "slow"
+
+    return _slow
+
+
+def delayed(sleep_function, delay: float, value):
+    async def _delayed():
+        await sleep_function(delay)
+        return value
+
+    return _delayed
+
+
+@pytest.mark.curio
+async def test_parallele_early_termination():
+    cancelled: list = []
+    start = monotonic()
+    assert await parallele(children=[c_func, slow(sleep, cancelled)], succes_threshold=1)()
+    assert not await parallele(children=[exception_func, slow(sleep, cancelled)])()
+    assert monotonic() - start < 5
+    assert cancelled == [True, True]
+
+
+@pytest.mark.asyncio
+async def test_parallele_asyncio_early_termination():
+    cancelled: list = []
+    start = monotonic()
+    assert await parallele_asyncio(
+        children=[delayed(asyncio_sleep, 0.01, "a"), slow(asyncio_sleep, cancelled)], succes_threshold=1
+    )()
+    assert not await parallele_asyncio(
+        children=[delayed(asyncio_sleep, 0.02, FAILURE), slow(asyncio_sleep, cancelled)], succes_threshold=2
+    )()
+    assert monotonic() - start < 5
+    assert cancelled == [True, True]
+
+
+def monitored(sleep_function, limiter: ConcurrencyLimiter, peaks: list):
+    async def _monitored():
+        peaks.append(limiter.in_flight)
+        await sleep_function(0.01)
+        return "m"
+
+    return _monitored
+
+
+@pytest.mark.curio
+async def test_parallele_max_concurrency():
+    limiter = ConcurrencyLimiter(max_concurrency=2)
+    peaks: list = []
+    children = [monitored(sleep, limiter, peaks) for _ in range(6)]
+    assert await parallele(children=children[:3], limiter=limiter)()
+    assert await parallele(children=children[3:], limiter=limiter, succes_threshold=2)()
+    assert max(peaks) == 2
+    assert limiter.in_flight == 0
+
+    assert await parallele(children=[delayed(sleep, 0.01, "a"), c_func], max_concurrency=1)()
+
+    with pytest.raises(AssertionError):
+        parallele(children=[a_func], max_concurrency=0)
+    with pytest.raises(AssertionError):
+        parallele(children=[a_func], max_concurrency=1, limiter=limiter)
+
+
+@pytest.mark.asyncio
+async def test_parallele_asyncio_max_concurrency():
+    limiter = ConcurrencyLimiter(max_concurrency=3)
+    peaks: list = []
+    children = [limiter.limit(monitored(asyncio_sleep, limiter, peaks), curio=False) for _ in range(10)]
+    assert await parallele_asyncio(children=children, succes_threshold=10)()
+    assert max(peaks) == 3
+    assert limiter.in_flight == 0
+
+
+@pytest.mark.skipif(sys.version_info < (3, 11), reason="requires python 3.11")
+def test_parallele_limiter_runners():
+    limiter = ConcurrencyLimiter(max_concurrency=1)
+    peaks: list = []
+    tree = parallele_results(
+        [monitored(asyncio_sleep, limiter, peaks) for _ in range(3)], limiter=limiter, backend="asyncio"
+    )
+    # each runner has its own event loop
+    for _ in range(2):
+        with BTreeRunner(disable_curio=True) as runner:
+            assert runner.run(tree) == ["m", "m", "m"]
+    assert max(peaks) == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(sys.version_info < (3, 11), reason="requires python 3.11")
+async def test_parallele_taskgroup():
+    def tree(children, **kwargs):
+        return parallele(children=children, backend="taskgroup", **kwargs)
+
+    assert await tree([delayed(asyncio_sleep, 0.01, "a"), c_func])()
+    assert not await tree([c_func, exception_func])()
+    assert await tree([c_func, exception_func], succes_threshold=1)()
+    assert not await tree([delayed(asyncio_sleep, 0.01, "a"), delayed(asyncio_sleep, 0.02, FAILURE)])()
+    assert await tree([])()
+    assert tree([c_func]).__node_metadata.name == "parallele"
+
+    cancelled: list = []
+    start = monotonic()
+    assert await tree([c_func, slow(asyncio_sleep, cancelled)], succes_threshold=1)()
+    assert not await tree([delayed(asyncio_sleep, 0.02, FAILURE), slow(asyncio_sleep, cancelled)])()
+    assert monotonic() - start < 5
+    # with eager tasks, first tree is decided before slow child creation
+    assert len(cancelled) == (1 if sys.version_info >= (3, 12) else 2)
+
+    limiter = ConcurrencyLimiter(max_concurrency=2)
+    peaks: list = []
+    assert await tree([monitored(asyncio_sleep, limiter, peaks) for _ in range(5)], limiter=limiter)()
+    assert max(peaks) == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(sys.version_info < (3, 11), reason="requires python 3.11")
+async def test_parallele_taskgroup_task_factory():
+    loop = get_running_loop()
+    created: list = []
+
+    def factory(loop, coro, **kwargs):
+        created.append(coro)
+        return Task(coro, loop=loop, **kwargs)
+
+    tree = parallele(children=[delayed(asyncio_sleep, 0.01, "a"), c_func], backend="taskgroup")
+    assert await tree()
+    # loop task factory is left alone
+    assert loop.get_task_factory() is None
+
+    loop.set_task_factory(factory)
+    try:
+        assert await tree()
+        assert len(created) == 2
+        assert loop.get_task_factory() is factory
+    finally:
+        loop.set_task_factory(None)
+
+
+def test_parallele_backend():
+    with pytest.raises(AssertionError):
+        parallele(children=[c_func], backend="thread")
+
+
+@pytest.mark.curio
+async def test_parallele_results():
+    results = await parallele_results(
+        children=[delayed(sleep, 0.03, "b"), delayed(sleep, 0.01, "a"), c_func, exception_func]
+    )()
+    assert results[:3] == ["b", "a", "c"]
+    assert isinstance(results[3], ControlFlowException)
+    assert await parallele_results(children=[])() == []
+    assert parallele_results(children=[a_func]).__node_metadata.name == "parallele_results"
+
+
+@pytest.mark.asyncio
+async def test_parallele_results_asyncio():
+    limiter = ConcurrencyLimiter(max_concurrency=1)
+    peaks: list = []
+    children = [
+        delayed(asyncio_sleep, 0.03, "b"),
+        delayed(asyncio_sleep, 0.01, "a"),
+        monitored(asyncio_sleep, limiter, peaks),
+    ]
+    assert await parallele_results(children=children, limiter=limiter, backend="asyncio")() == ["b", "a", "m"]
+    assert max(peaks) == 1
+
+
+@pytest.mark.curio
+async def test_parallele_as_completed():
+    tree = parallele_as_completed(children=[delayed(sleep, 0.03, "b"), delayed(sleep, 0.01, "a"), c_func])
+    completed = [index async for index, _ in await tree()]
+    assert completed == [2, 1, 0]
+
+
+@pytest.mark.asyncio
+async def test_parallele_as_completed_asyncio():
+    cancelled: list = []
+    iterator = await parallele_as_completed(
+        children=[delayed(asyncio_sleep, 0.01, "a"), slow(asyncio_sleep, cancelled)], backend="asyncio"
+    )()
+    async for index, result in iterator:
+        assert (index, result) == (0, "a")
+        break
+    await iterator.aclose()
+    assert cancelled == [True]
+
+
+def item_tree(sleep_function, peaks: list, in_flight: list):
+    def _factory(delay):
+        async def _item():
+            in_flight.append(delay)
+            peaks.append(len(in_flight))
+            try:
+                await sleep_function(abs(delay))
+            finally:
+                in_flight.remove(delay)
+            if delay < 0:
+                raise ValueError(delay)
+            return delay
+
+        return _item
+
+    return _factory
+
+
+@pytest.mark.curio
+async def test_foreach():
+    peaks: list = []
+    factory = item_tree(sleep, peaks, [])
+    start = monotonic()
+    assert await foreach([0.02, 0.01, 0.02, 0.01], factory, concurrency=2)()
+    assert monotonic() - start < 0.06
+    assert max(peaks) == 2
+    assert await foreach([], factory)()
+    assert not await foreach([0.01, -0.01, 0.01], factory)()
+    assert await foreach([-0.01, 0.01, -0.01], factory, succes_threshold=1)()
+    assert await foreach([-0.01, -0.01], factory, succes_threshold=1)() is FAILURE
+    assert await foreach([0.01], lambda item: lambda: RUNNING)() is RUNNING
+    with pytest.raises(AssertionError):
+        foreach([], factory, concurrency=0)
+
+
+@pytest.mark.asyncio
+async def test_foreach_stop_reading():
+    read: list = []
+    in_flight: list = []
+
+    async def source():
+        for delay in [0.01, 0.02, 5, 5, 5]:
+            read.append(delay)
+            yield delay
+
+    start = monotonic()
+    node = foreach(source, item_tree(asyncio_sleep, [], in_flight), concurrency=2, succes_threshold=2)
+    assert await node()
+    assert monotonic() - start < 1
+    # decided after second item, third is running and cancelled
+    assert read == [0.01, 0.02, 5]
+    assert in_flight == []
+    assert await node()
@@ -0,0 +1,78 @@
+import pytest
+
+from async_btree import Pipeline
+from async_btree.utils import sleep
+
+
+async def slow_inc(i):
+    await sleep(0.01)
+    return i + 1
+
+
+def even(i):
+    return i % 2 == 0
+
+
+@pytest.mark.curio
+async def test_pipeline():
+    pipeline = Pipeline(range(10), queue_size=2).map(slow_inc, concurrency=5).filter(even).map(str, name="format")
+    assert sorted([item async for item in pipeline], key=int) == ["2", "4", "6", "8", "10"]
+
+    metrics = pipeline.metrics()
+    assert [(m.name, m.concurrency, m.processed) for m in metrics] == [
+        ("slow_inc", 5, 10),
+        ("even", 1, 10),
+        ("format", 1, 5),
+    ]
+    assert all(m.throughput > 0 and m.in_flight == 0 for m in metrics)
+
+    # a single worker keep order
+    assert [item async for item in Pipeline(range(5)).map(slow_inc)] == [1, 2, 3, 4, 5]
+    assert [item async for item in Pipeline([])] == []
+
+    with pytest.raises(AssertionError):
+        Pipeline(range(10), queue_size=0)
+    with pytest.raises(AssertionError):
+        Pipeline(range(10)).map(slow_inc, concurrency=0)
+
+
+@pytest.mark.asyncio
+async def test_pipeline_asyncio():
+    async def source():
+        for i in range(20):
+            yield i
+
+    started: list = []
+
+    async def track(i):
+        started.append(i)
+        return await slow_inc(i)
+
+    pipeline = Pipeline(source(), queue_size=2).map(track, concurrency=2)
+    async for item in pipeline:
+        # bounded queues limit read ahead
+        assert len(started) <= item + 2 + 2 + 2
+        depths = [m.queue_depth for m in pipeline.metrics()]
+        assert max(depths) <= 2
+    assert len(started) == 20
+
+
+@pytest.mark.asyncio
+async def test_pipeline_error():
+    cancelled: list = []
+
+    async def failing(i):
+        if i == 3:
+            raise ValueError(i)
+        try:
+            await sleep(10 if i > 3 else 0)
+        except BaseException:
+            cancelled.append(i)
+            raise
+        return i
+
+    pipeline = Pipeline(range(10)).map(failing, concurrency=3)
+    with pytest.raises(ValueError):
+        [item async for item in pipeline]
+    assert cancelled
+    assert all(m.in_flight == 0 for m in pipeline.metrics())
@@ -1,9 +1,11 @@
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from contextvars import ContextVar
 
 import pytest
 
-from async_btree import BTreeRunner
+from async_btree import BTreeRunner, ControlFlowException, process_action
 
 counter = ContextVar("counter", default=5)
 
@@ -67,3 +69,24 @@ def test_asyncio_runner_share_context():
         _check_sequence(runner=BTreeRunner(disable_curio=True))
         assert counter.get() == 5
         _check_sequence(runner=BTreeRunner(disable_curio=True))
+
+
+def test_runner_process_pool():
+    with ProcessPoolExecutor(max_workers=1) as pool, BTreeRunner(process_pool=pool) as r:
+        pid = r.run(process_action(os.getpid))
+        assert pid != os.getpid()
+        assert r.run(process_action(os.getpid)) == pid
+
+
+def test_runner_timeout():
+    async def slow():
+        from curio import sleep
+
+        await sleep(10)
+        return "slow"
+
+    with BTreeRunner(timeout=0.05) as r:
+        result = r.run(slow)
+        assert isinstance(result, ControlFlowException)
+        assert isinstance(result.exception, TimeoutError)
+        assert r.run(a_func) == "a"
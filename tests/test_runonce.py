@@ -1,6 +1,10 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
 
-from async_btree.utils import run_once
+from async_btree import parallele_results
+from async_btree.utils import run_once, sleep
 
 
 @run_once
@@ -22,3 +26,97 @@ def test_sync_runonce():
 async def test_async_runonce():
     assert await ainc(a=1) == 2
     assert await ainc(a=2) == 2  # call once
+
+
+def counter(calls: list):
+    async def _init(a: int = 0):
+        calls.append(a)
+        await sleep(0.01)
+        if a < 0:
+            raise ValueError(a)
+        return len(calls)
+
+    return _init
+
+
+@pytest.mark.curio
+async def test_async_runonce_concurrent():
+    calls: list = []
+    init = run_once(counter(calls))
+    assert await parallele_results([init, init, init])() == [1, 1, 1]
+    assert calls == [0]
+
+    init.reset()
+    assert await init() == 2
+
+
+@pytest.mark.asyncio
+async def test_async_runonce_keyed():
+    calls: list = []
+    init = run_once(keyed=True, maxsize=2)(counter(calls))
+    assert await init(1) == 1
+    assert await init(2) == 2
+    assert await init(1) == 1
+    assert await init(3) == 3
+    # 2 is dropped
+    assert await init(2) == 4
+
+    # exception is not kept
+    with pytest.raises(ValueError):
+        await init(-1)
+    with pytest.raises(ValueError):
+        await init(-1)
+    assert len(calls) == 6
+
+
+def test_sync_runonce_ttl():
+    calls: list = []
+
+    @run_once(ttl=0.02)
+    def load():
+        calls.append(True)
+        return len(calls)
+
+    assert load() == 1
+    assert load() == 1
+    time.sleep(0.03)
+    assert load() == 2
+    load.reset()
+    assert load() == 3
+
+    with pytest.raises(AssertionError):
+        run_once(maxsize=0)
+    with pytest.raises(AssertionError):
+        run_once(ttl=0)
+
+
+def test_sync_runonce_reentrant():
+    @run_once
+    def load():
+        return load()
+
+    with pytest.raises(RuntimeError):
+        load()
+
+    @run_once(keyed=True)
+    def factorial(n: int):
+        return n * factorial(n - 1) if n else 1
+
+    assert factorial(5) == 120
+
+
+def test_sync_runonce_threads():
+    calls: list = []
+
+    @run_once(keyed=True)
+    def load(key: int):
+        calls.append(key)
+        time.sleep(0.1)
+        return key
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        assert list(pool.map(load, [0, 1, 2, 3, 0, 1, 2, 3])) == [0, 1, 2, 3, 0, 1, 2, 3]
+    # keys are loaded concurrently, once each
+    assert time.monotonic() - start < 0.3
+    assert sorted(calls) == [0, 1, 2, 3]
@@ -1,9 +1,15 @@
 # from asyncio import run as run_asyncio
 from contextvars import ContextVar, copy_context
+from functools import partial, wraps
+from gc import collect
+from pickle import dumps
+from weakref import ref
 
 from curio import Kernel
 
-from async_btree.utils import has_curio
+from async_btree import analyze
+from async_btree.definition import alias_node_metadata
+from async_btree.utils import has_curio, to_async
 
 counter = ContextVar("counter", default=5)
 
@@ -37,3 +43,59 @@ def test_run_curio_with_same_contextvar():
 
 def test_has_curio():
     assert has_curio()
+
+
+class Greeter:
+    def __init__(self, name):
+        self.name = name
+
+    def hello(self):
+        return self.name
+
+
+def test_to_async_cache():
+    def target():
+        return "a"
+
+    wrapper = to_async(target)
+    assert to_async(target) is wrapper
+    assert to_async(wrapper) is wrapper
+    # bound methods of a same function are not mixed up
+    assert to_async(Greeter("a").hello) is not to_async(Greeter("b").hello)
+    with Kernel() as k:
+        assert k.run(to_async(Greeter("b").hello)) == "b"
+
+    # wrapper live as long as target
+    reference = ref(target)
+    del target, wrapper
+    collect()
+    assert reference() is None
+
+
+def test_to_async_cache_wraps():
+    def target():
+        return "target"
+
+    @wraps(target)
+    def wrapped():
+        return "wrapped"
+
+    # wraps copy target __dict__ (and its cached wrapper)
+    wrapper = to_async(target)
+    assert to_async(wrapped) is not wrapper
+    with Kernel() as k:
+        assert k.run(to_async(wrapped)) == "wrapped"
+        assert k.run(wrapper) == "target"
+
+
+def test_to_async_cache_outside_target():
+    call = partial(pow, 2, 3)
+    wrapper = to_async(call)
+    assert to_async(call) is wrapper
+    # partial could still be sent to a process pool
+    assert dumps(call)
+
+    aliased = alias_node_metadata(to_async(call), name="power")
+    assert analyze(aliased).name == "power"
+    assert analyze(to_async(call)).name == "anonymous"
+    assert to_async(call) is wrapper